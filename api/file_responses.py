@@ -0,0 +1,120 @@
+"""
+Réponses fichier avec validation HTTP (ETag, If-None-Match, If-Modified-Since)
+et requêtes partielles (Range, If-Range)
+
+Starlette ne gère ni les requêtes partielles ni l'envoi direct d'un fichier par
+le serveur: ImageFileResponse utilise l'extension ASGI "http.response.pathsend"
+(sendfile) quand le serveur la propose, et sinon la lecture par blocs de FileResponse.
+"""
+import os
+import re
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class ImageFileResponse(FileResponse):
+    """FileResponse envoyée par le serveur (sendfile) quand il le permet"""
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.send_header_only or "http.response.pathsend" not in scope.get("extensions", {}):
+            await super().__call__(scope, receive, send)
+            return
+        
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Comparaison faible de If-None-Match (RFC 9110)"""
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def is_not_modified(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    """La copie du client est-elle à jour (réponse 304)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Intervalle (début, fin incluse) d'un en-tête Range à un seul intervalle
+    
+    Returns:
+        None si l'en-tête est ignoré (syntaxe inconnue, plusieurs intervalles)
+    
+    Raises:
+        ValueError si l'intervalle est hors du fichier (réponse 416)
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    
+    start, end = match.groups()
+    if not start:
+        # bytes=-N: les N derniers octets
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+async def file_response(
+    request: Request,
+    path: str,
+    stat_result: os.stat_result,
+    etag: str,
+    headers: Dict[str, str],
+    media_type: Optional[str] = None
+) -> Response:
+    """Réponse 200, 206, 304 ou 416 pour un fichier selon les en-têtes de la requête"""
+    headers = {**headers, "ETag": etag, "Accept-Ranges": "bytes"}
+    
+    if is_not_modified(request, etag, stat_result):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and request.method == "GET" and (if_range is None or if_range == etag):
+        size = stat_result.st_size
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        
+        if byte_range is not None:
+            start, end = byte_range
+            async with aiofiles.open(path, "rb") as f:
+                await f.seek(start)
+                body = await f.read(end - start + 1)
+            return Response(
+                body,
+                status_code=206,
+                media_type=media_type,
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+            )
+    
+    return ImageFileResponse(
+        path,
+        headers=headers,
+        media_type=media_type,
+        stat_result=stat_result,
+        method=request.method
+    )
@@ -13,6 +13,12 @@ except ImportError:
     from fastapi import APIRouter
     export_router = APIRouter(prefix="/export", tags=["export"])
 
+try:
+    from .image_router import router as image_router
+except ImportError:
+    from fastapi import APIRouter
+    image_router = APIRouter(prefix="/images", tags=["images"])
+
 try:
     from .health_router import router as health_router
 except ImportError:
@@ -1,7 +1,57 @@
+from datetime import timedelta
 from fastapi import APIRouter
 
+from config.settings import settings
+from database.db_manager import database
+from database.repositories.product_repository import product_repository
+from database.repositories.worker_repository import worker_repository
+from scraper.processor import scraper_processor
+from scraper.rate_limiter import rate_limiter
+from services.image_pipeline import image_pipeline
+from services.image_store import image_store
+from workers.task_worker import embedded_worker
+
 router = APIRouter(prefix="/health", tags=["health"])
 
 @router.get("/")
 async def health_check():
-    return {"status": "ok"} 
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/rate-limits")
+async def rate_limit_stats():
+    """Débit courant, throttling et attentes par site scrapé"""
+    return rate_limiter.stats()
+
+@router.get("/cache")
+async def product_cache_stats():
+    """Taille et taux de succès du cache mémoire des produits"""
+    return product_repository.cache.stats()
+
+@router.get("/inflight")
+async def inflight_stats():
+    """EANs en cours de traitement et appels simultanés regroupés sur un traitement existant"""
+    return scraper_processor.inflight.stats()
+
+@router.get("/images")
+async def image_pipeline_stats():
+    """Images en attente de téléchargement, bilan du pipeline et déduplication du stockage"""
+    return {**image_pipeline.stats(), "store": image_store.stats()}
+
+@router.get("/database")
+async def database_stats():
+    """Profil du moteur de base de données et état des connexions"""
+    if hasattr(database, "stats"):
+        return database.stats()
+    return {"engine": "databases", "connected": database.is_connected}
+
+@router.get("/workers")
+async def worker_stats():
+    """État de chaque worker de la file de tâches (vivant s'il s'est signalé récemment)"""
+    workers = await worker_repository.get_all(
+        stale_after=timedelta(seconds=settings.workers.heartbeat_interval * 3)
+    )
+    return {
+        "embedded": embedded_worker.stats() if embedded_worker.is_running else None,
+        "alive": sum(1 for worker in workers if worker["alive"]),
+        "workers": workers
+    }
\ No newline at end of file
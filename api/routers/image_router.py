@@ -0,0 +1,65 @@
+import asyncio
+import mimetypes
+import os
+import re
+import stat
+
+from fastapi import APIRouter, HTTPException, Request
+
+from api.file_responses import file_response
+from config.settings import settings
+from services.image_pipeline import RENDITION_FORMATS
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+# Fichiers adressés par contenu (ImageStore): <sha256>[-<taille>].<extension>, jamais modifiés
+_CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{64}(-\d+)?\.[a-z]+$")
+
+_MEDIA_TYPES = {extension: f"image/{format}" for format, (_, extension) in RENDITION_FORMATS.items()}
+_MEDIA_TYPES["jpg"] = "image/jpeg"
+
+def _resolve(path: str) -> str:
+    """Chemin du fichier dans le dossier des images (404 en dehors)"""
+    root = os.path.realpath(settings.image.storage_path)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep):
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    return full_path
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+async def get_image(path: str, request: Request):
+    """
+    Sert une image du dossier des images
+    
+    Les fichiers adressés par contenu ont un ETag fort dérivé de leur nom et sont
+    cachés indéfiniment (immutable); les autres sont revalidés après
+    IMAGE_CACHE_MAX_AGE secondes. Répond 304 aux requêtes conditionnelles et 206
+    aux requêtes partielles.
+    """
+    full_path = _resolve(path)
+    try:
+        stat_result = await asyncio.to_thread(os.stat, full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    
+    filename = os.path.basename(full_path)
+    if _CONTENT_ADDRESSED_RE.match(filename):
+        etag = f'"{filename}"'
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        cache_control = f"public, max-age={settings.image.cache_max_age}"
+    
+    extension = filename.rpartition(".")[2].lower()
+    media_type = _MEDIA_TYPES.get(extension) or mimetypes.guess_type(filename)[0]
+    
+    return await file_response(
+        request,
+        full_path,
+        stat_result,
+        etag,
+        {"Cache-Control": cache_control},
+        media_type
+    )
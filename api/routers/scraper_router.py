@@ -1,13 +1,19 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from typing import List, Dict, Any, Literal, Optional
+from collections import Counter
+import asyncio
 import logging
-import uuid
-from datetime import datetime
 
-from models.request_models import EANRequest, BoxDataRequest, TaskStatus
+from api.streaming import EVENT_DONE, EVENT_PRODUCT, EVENT_RESET, StreamFormat, stream_response
+from config.settings import settings
+from database.repositories.task_repository import task_repository, TASK_COMPLETED, TASK_FAILED
+from models.request_models import (
+    EANRequest, BoxDataRequest, TaskStatus, TaskResultsPage, ProductBatchRequest, ProductBatchResponse
+)
 from models.product import Product
 from scraper.processor import scraper_processor
-from workers.task_queue import TaskQueue, tasks
+from utils.ean_normalizer import EanNormalizer
+from workers.task_queue import TaskQueue
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/scraper", tags=["scraper"])
@@ -26,25 +32,9 @@ async def process_single_ean(ean_request: EANRequest):
         raise HTTPException(status_code=500, detail=f"Erreur de traitement: {str(e)}")
 
 @router.post("/ean/async", response_model=TaskStatus)
-async def process_single_ean_async(ean_request: EANRequest, background_tasks: BackgroundTasks):
+async def process_single_ean_async(ean_request: EANRequest):
     """Traite un seul EAN de manière asynchrone"""
-    task_id = f"ean_task_{uuid.uuid4()}"
-    
-    # Créer une entrée de tâche
-    tasks[task_id] = {
-        "status": "pending",
-        "message": f"Traitement de l'EAN {ean_request.ean} en cours...",
-        "created_at": datetime.now(),
-        "results": None
-    }
-    
-    # Ajouter la tâche en arrière-plan
-    background_tasks.add_task(
-        TaskQueue.process_ean_task,
-        task_id=task_id,
-        ean=ean_request.ean,
-        brand=ean_request.brand
-    )
+    task_id = await TaskQueue.enqueue_ean(ean=ean_request.ean, brand=ean_request.brand)
     
     return TaskStatus(
         task_id=task_id,
@@ -62,25 +52,29 @@ async def process_box_data(box_request: BoxDataRequest):
         logger.error(f"Erreur lors du traitement des données de box: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur de traitement: {str(e)}")
 
+@router.post("/box/stream")
+async def stream_box_data(box_request: BoxDataRequest, format: StreamFormat = "ndjson"):
+    """
+    Traite des données de box en renvoyant chaque produit dès qu'il est traité
+    
+    NDJSON (une ligne par produit) ou Server-Sent Events (`format=sse`), terminé
+    par un bilan incluant les EANs rejetés.
+    """
+    normalizer = EanNormalizer()
+    
+    async def events():
+        count = 0
+        async for product in scraper_processor.stream_box_data(box_request.box_data, normalizer):
+            count += 1
+            yield EVENT_PRODUCT, product, count
+        yield EVENT_DONE, {"count": count, "normalization": normalizer.report()}, None
+    
+    return stream_response(events(), format)
+
 @router.post("/box/async", response_model=TaskStatus)
-async def process_box_data_async(box_request: BoxDataRequest, background_tasks: BackgroundTasks):
+async def process_box_data_async(box_request: BoxDataRequest):
     """Traite des données de box de manière asynchrone"""
-    task_id = f"box_task_{uuid.uuid4()}"
-    
-    # Créer une entrée de tâche
-    tasks[task_id] = {
-        "status": "pending",
-        "message": "Traitement des données de box en cours...",
-        "created_at": datetime.now(),
-        "results": None
-    }
-    
-    # Ajouter la tâche en arrière-plan
-    background_tasks.add_task(
-        TaskQueue.process_box_task,
-        task_id=task_id,
-        box_data=box_request.box_data
-    )
+    task_id = await TaskQueue.enqueue_box(box_request.box_data)
     
     return TaskStatus(
         task_id=task_id,
@@ -91,16 +85,151 @@ async def process_box_data_async(box_request: BoxDataRequest, background_tasks:
 @router.get("/task/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     """Récupère le statut d'une tâche"""
-    if task_id not in tasks:
+    task_info = await TaskQueue.get_task(task_id)
+    if not task_info:
         raise HTTPException(status_code=404, detail="Tâche non trouvée")
     
-    task_info = tasks[task_id]
+    # Résultats en ligne pour les petites tâches, sinon pagination via /task/{task_id}/results
+    results = task_info.get("results")
+    if results is not None:
+        results_count = len(results)
+    else:
+        results_count = await task_repository.count_results(task_id)
+        if results_count <= settings.task_queue.inline_results:
+            page = await task_repository.get_results(task_id, limit=max(1, results_count))
+            results = [entry["result"] for entry in page]
     
     return TaskStatus(
         task_id=task_id,
         status=task_info["status"],
         message=task_info["message"],
-        results=task_info.get("results")
+        results=results,
+        results_count=results_count
+    )
+
+@router.get("/task/{task_id}/results", response_model=TaskResultsPage)
+async def get_task_results(task_id: str, after: int = 0, limit: int = 100):
+    """
+    Page des résultats d'une tâche, disponibles pendant son exécution
+    
+    `after` est le numéro du dernier résultat déjà reçu (0 au départ), la page
+    suivante commence à `next_after`. Les résultats d'une nouvelle tentative sont
+    numérotés à la suite: si `attempt` change, ceux déjà reçus sont à remplacer.
+    """
+    task_info = await TaskQueue.get_task(task_id)
+    if not task_info:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    
+    limit = max(1, min(limit, 1000))
+    page = await task_repository.get_results(task_id, after=after, limit=limit)
+    if not page and task_info.get("results"):
+        # Tâche terminée avant la pagination: résultats stockés sur la tâche
+        page = [{"seq": seq, "result": result} for seq, result in enumerate(task_info["results"], start=1)][after:after + limit]
+    
+    return TaskResultsPage(
+        task_id=task_id,
+        status=task_info["status"],
+        results=[entry["result"] for entry in page],
+        next_after=page[-1]["seq"] if page else None,
+        attempt=page[0].get("attempt") if page else None
+    )
+
+@router.get("/task/{task_id}/results/stream")
+async def stream_task_results(
+    task_id: str,
+    after: int = 0,
+    format: StreamFormat = "ndjson",
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Suit les résultats d'une tâche jusqu'à sa fin (NDJSON ou Server-Sent Events)
+    
+    Un client SSE qui se reconnecte reprend après le dernier événement reçu (Last-Event-ID).
+    Un événement "reset" précède les résultats d'une nouvelle tentative de la tâche:
+    les résultats reçus auparavant sont à ignorer.
+    """
+    if not await TaskQueue.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    
+    async def events():
+        cursor = last_event_id if last_event_id is not None else after
+        # Tentative des résultats déjà reçus par le client
+        attempt = await task_repository.get_result_attempt(task_id, cursor) if cursor > 0 else None
+        while True:
+            page = await task_repository.get_results(task_id, after=cursor, limit=100)
+            for entry in page:
+                if attempt is not None and entry["attempt"] != attempt:
+                    yield EVENT_RESET, {"attempt": entry["attempt"]}, None
+                attempt = entry["attempt"]
+                cursor = entry["seq"]
+                yield EVENT_PRODUCT, entry["result"], cursor
+            if page:
+                continue
+            
+            task_info = await TaskQueue.get_task(task_id)
+            if task_info is None or task_info["status"] in (TASK_COMPLETED, TASK_FAILED):
+                # Dernière lecture: des résultats ont pu être écrits juste avant la fin
+                if await task_repository.get_results(task_id, after=cursor, limit=1):
+                    continue
+                yield EVENT_DONE, {
+                    "status": task_info["status"] if task_info else "unknown",
+                    "message": task_info["message"] if task_info else "",
+                    "count": await task_repository.count_results(task_id)
+                }, None
+                return
+            await asyncio.sleep(settings.task_queue.results_flush_interval)
+    
+    return stream_response(events(), format)
+
+@router.get("/tasks/dead-letter", response_model=List[TaskStatus])
+async def get_dead_letter_tasks(limit: int = 100):
+    """Liste les tâches en échec définitif (tentatives épuisées)"""
+    tasks = await task_repository.get_dead_letters(limit=limit)
+    
+    return [
+        TaskStatus(task_id=task["id"], status=task["status"], message=task["message"])
+        for task in tasks
+    ]
+
+@router.post("/task/{task_id}/retry", response_model=TaskStatus)
+async def retry_task(task_id: str):
+    """Remet en file une tâche en échec définitif"""
+    task_info = await TaskQueue.get_task(task_id)
+    if not task_info:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    if task_info["status"] != TASK_FAILED:
+        raise HTTPException(status_code=409, detail="Seule une tâche en échec peut être relancée")
+    
+    await task_repository.requeue(task_id, settings.task_queue.max_attempts)
+    
+    return TaskStatus(
+        task_id=task_id,
+        status="pending",
+        message="Tâche remise en file"
+    )
+
+@router.post("/products/batch", response_model=ProductBatchResponse)
+async def lookup_products_batch(batch_request: ProductBatchRequest):
+    """
+    Recherche groupée d'EANs
+    
+    Les produits connus sont lus en une requête groupée, seuls les EANs absents
+    sont scrapés (en parallèle). Chaque EAN reçoit un statut: cached, scraped,
+    not_found, invalid ou error.
+    """
+    max_eans = settings.batch.lookup_max_eans
+    if len(batch_request.eans) > max_eans:
+        raise HTTPException(status_code=413, detail=f"Maximum {max_eans} EANs par requête")
+    
+    try:
+        results = await scraper_processor.lookup_batch(batch_request.eans, batch_request.brand)
+    except Exception as e:
+        logger.error(f"Erreur lors de la recherche groupée: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur de traitement: {str(e)}")
+    
+    return ProductBatchResponse(
+        results=results,
+        counts=dict(Counter(result["status"] for result in results))
     )
 
 @router.get("/products/{ean}", response_model=Product)
@@ -116,12 +245,33 @@ async def get_product_by_ean(ean: str):
 
 @router.get("/products", response_model=List[Product])
 async def get_products(
+    response: Response,
     limit: int = 50, 
     offset: int = 0, 
-    brand: Optional[str] = None
+    brand: Optional[str] = None,
+    brand_match: Literal["contains", "exact", "prefix"] = "prefix",
+    cursor: Optional[str] = None
 ):
-    """Récupère tous les produits avec pagination et filtrage optionnel"""
+    """
+    Récupère tous les produits avec pagination et filtrage optionnel
+    
+    Pagination par offset, ou par curseur (keyset) si `cursor` est fourni.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    """
     from database.repositories.product_repository import product_repository
     
-    products = await product_repository.get_all(limit=limit, offset=offset, brand=brand)
+    try:
+        products = await product_repository.get_all(
+            limit=limit,
+            offset=offset,
+            brand=brand,
+            brand_match=brand_match,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if products and len(products) == limit:
+        response.headers["X-Next-Cursor"] = product_repository.encode_cursor(products[-1])
+    
     return products
\ No newline at end of file
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, BackgroundTasks
-from typing import List, Optional
+from fastapi.responses import RedirectResponse
+from typing import List, Literal, Optional
 from models.product import Product, ProductImage
 from services.image_service import image_service
-from database.repositories.product_repository import product_repository
+from database.repositories.product_repository import product_repository, public_image_url
 #from api.dependencies import get_current_user
 
 router = APIRouter(prefix="/upload", tags=["upload"])
@@ -36,6 +37,21 @@ async def get_product_images(
     images = await product_repository.get_product_images(ean)
     return images
 
+@router.get("/{ean}/{image_id}/rendition")
+async def get_image_rendition(
+    ean: str,
+    image_id: int,
+    width: int = 400,
+    format: Literal["webp", "jpeg", "avif"] = "webp",
+    #current_user = Depends(get_current_user)
+):
+    """Redirect to the smallest rendition of an image at least `width` pixels wide"""
+    rendition = await image_service.get_rendition(ean, image_id, width, format)
+    url = public_image_url(rendition.get("local_path"))
+    if not url:
+        raise HTTPException(status_code=404, detail="Image file not found")
+    return RedirectResponse(url)
+
 @router.put("/{ean}/primary/{image_id}")
 async def set_primary_image(
     ean: str,
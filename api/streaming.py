@@ -0,0 +1,48 @@
+"""
+Réponses en flux (NDJSON ou Server-Sent Events)
+
+Les routes produisent des événements (nom, données, id optionnel): "product"
+pour chaque résultat, puis "done" avec le bilan. "reset" signale que les
+résultats déjà reçus sont remplacés par ceux d'une nouvelle tentative de la
+tâche. En NDJSON chaque résultat est une ligne JSON et les autres événements des
+lignes {"done": true, ...} ou {"reset": true, ...}; en SSE ce sont des
+événements nommés, l'id permettant la reprise (en-tête Last-Event-ID).
+"""
+import json
+from typing import Any, AsyncIterator, Literal, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+StreamFormat = Literal["ndjson", "sse"]
+
+EVENT_PRODUCT = "product"
+EVENT_DONE = "done"
+EVENT_RESET = "reset"
+
+Event = Tuple[str, Any, Optional[int]]
+
+def _dumps(data: Any) -> str:
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False)
+
+async def _ndjson(events: AsyncIterator[Event]) -> AsyncIterator[str]:
+    async for name, data, _ in events:
+        if name != EVENT_PRODUCT:
+            data = {name: True, **data}
+        yield _dumps(data) + "\n"
+
+async def _sse(events: AsyncIterator[Event]) -> AsyncIterator[str]:
+    async for name, data, event_id in events:
+        prefix = f"id: {event_id}\n" if event_id is not None else ""
+        yield f"{prefix}event: {name}\ndata: {_dumps(data)}\n\n"
+
+def stream_response(events: AsyncIterator[Event], format: StreamFormat = "ndjson") -> StreamingResponse:
+    """Réponse HTTP qui émet chaque événement dès qu'il est produit"""
+    if format == "sse":
+        return StreamingResponse(
+            _sse(events),
+            media_type="text/event-stream",
+            # Pas de mise en tampon par un proxy (nginx) devant l'API
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    return StreamingResponse(_ndjson(events), media_type="application/x-ndjson")
@@ -0,0 +1,159 @@
+"""
+Benchmark de l'analyse HTML: python -m benchmarks.parse_benchmark [--iterations N]
+
+Compare l'extraction d'origine (BeautifulSoup + html.parser dans la boucle) au
+moteur de specs de scraper.extraction pour chaque moteur installé, sur les pages de
+benchmarks/fixtures, puis mesure le blocage de la boucle asyncio pendant des
+analyses concurrentes, dans la boucle et dans le pool de processus.
+"""
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from scraper.extraction import extract
+from scraper.parsing import ParserPool, available_backends
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SITE_NAME = "celiostore.cz"
+CELIO_CONTEXT = {"site_name": SITE_NAME}
+
+def legacy_celio(html: str) -> dict:
+    """Extraction CELIO d'origine"""
+    result = {}
+    soup = BeautifulSoup(html, 'html.parser')
+    articles = soup.find_all("article", limit=3)
+    if not articles:
+        return result
+    article = articles[0]
+    h1 = article.find("h1")
+    if h1:
+        result['name'] = h1.get_text(strip=True)
+    desc_tag = article.find(class_="description") or article.find(class_="product-description")
+    if desc_tag:
+        result['description'] = desc_tag.get_text(strip=True)
+    size_tag = article.find(class_="size") or article.find(class_="variant")
+    if size_tag:
+        result['size'] = size_tag.get_text(strip=True)
+    color_tag = article.find(class_="color") or article.find(class_="couleur")
+    if color_tag:
+        result['color'] = color_tag.get_text(strip=True)
+    img_tag = article.find("img")
+    if img_tag:
+        src = img_tag.get("src") or img_tag.get("data-src")
+        if src and not src.startswith("http"):
+            src = f"https://{SITE_NAME}{src}"
+        result['image_url'] = src
+    price_tag = article.find(class_=re.compile(r'price'))
+    if price_tag:
+        result['price'] = price_tag.get_text(strip=True)
+    return result
+
+def legacy_modov(html: str) -> dict:
+    """Extraction Modov d'origine"""
+    result = {}
+    soup = BeautifulSoup(html, 'html.parser')
+    h1 = soup.find('h1')
+    if h1:
+        result['name'] = h1.get_text(strip=True)
+    brand_tag = soup.find('span', class_='brand') or soup.find('div', class_='brand')
+    if brand_tag:
+        result['brand'] = brand_tag.get_text(strip=True)
+    desc_tag = soup.find('div', class_='description') or soup.find('div', class_='product-description')
+    if desc_tag:
+        result['description'] = desc_tag.get_text(strip=True)
+    for img in soup.find_all('img'):
+        if 'product' in str(img.get('class', [])).lower():
+            result['image_url'] = img.get('src') or img.get('data-src')
+            break
+    price_tag = soup.find('span', class_='price') or soup.find('div', class_='price')
+    if price_tag:
+        result['price'] = price_tag.get_text(strip=True)
+    return result
+
+PAGES = [
+    ("celio_search.html", legacy_celio, lambda body, backend: extract("celio", body, "utf-8", CELIO_CONTEXT, backend)),
+    ("modov_product.html", legacy_modov, lambda body, backend: extract("modov", body, "utf-8", {"domain": "modov.sk"}, backend))
+]
+
+def timed(func, iterations: int) -> float:
+    """Durée médiane d'un appel, en millisecondes"""
+    durations = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(durations)
+
+def benchmark_backends(iterations: int):
+    print(f"Analyse d'une page (médiane sur {iterations} itérations)")
+    for filename, legacy, run in PAGES:
+        body = (FIXTURES / filename).read_bytes()
+        expected = legacy(body.decode("utf-8"))
+        baseline = timed(lambda: legacy(body.decode("utf-8")), iterations)
+        print(f"\n{filename} ({len(body) // 1024} Ko)")
+        print(f"  {'origine (html.parser)':<24} {baseline:8.2f} ms")
+        
+        for backend in available_backends():
+            data = run(body, backend)
+            status = "OK" if data == expected else f"DIFFÉRENT: {data}"
+            duration = timed(lambda: run(body, backend), iterations)
+            print(f"  {backend:<24} {duration:8.2f} ms  x{baseline / duration:5.1f}  {status}")
+
+async def _loop_lag(parses, tick: float = 0.005) -> float:
+    """Exécute les analyses et retourne le plus long blocage de la boucle (ms)"""
+    lag = 0.0
+    running = True
+    
+    async def ticker():
+        nonlocal lag
+        while running:
+            started_at = time.perf_counter()
+            await asyncio.sleep(tick)
+            lag = max(lag, (time.perf_counter() - started_at - tick) * 1000)
+    
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(tick)
+    await asyncio.gather(*parses)
+    running = False
+    await task
+    return lag
+
+async def benchmark_loop(concurrency: int, processes: int):
+    body = (FIXTURES / "celio_search.html").read_bytes()
+    html = body.decode("utf-8")
+    
+    async def inline():
+        # Comme avant: analyse dans la coroutine du scraper
+        legacy_celio(html)
+    
+    pool = ParserPool(processes=processes)
+    # Démarrer les processus avant la mesure
+    await asyncio.gather(*(pool.run(extract, "celio", body, "utf-8", CELIO_CONTEXT) for _ in range(processes)))
+    
+    print(f"\nBlocage maximal de la boucle pendant {concurrency} analyses concurrentes")
+    started_at = time.perf_counter()
+    lag = await _loop_lag([inline() for _ in range(concurrency)])
+    print(f"  {'origine (dans la boucle)':<24} {lag:8.1f} ms  (total {(time.perf_counter() - started_at) * 1000:.0f} ms)")
+    
+    started_at = time.perf_counter()
+    lag = await _loop_lag([pool.run(extract, "celio", body, "utf-8", CELIO_CONTEXT) for _ in range(concurrency)])
+    print(f"  {f'pool ({processes} processus)':<24} {lag:8.1f} ms  (total {(time.perf_counter() - started_at) * 1000:.0f} ms)")
+    pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.parse_benchmark")
+    parser.add_argument("--iterations", "-n", type=int, default=20)
+    parser.add_argument("--concurrency", "-c", type=int, default=32)
+    parser.add_argument("--processes", "-p", type=int, default=2)
+    args = parser.parse_args()
+    
+    benchmark_backends(args.iterations)
+    asyncio.run(benchmark_loop(args.concurrency, args.processes))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from typing import Callable, List, Dict, Any, Optional
+import asyncio
+import logging
+import time
+
+from config.settings import settings
+from database.repositories.product_repository import ProductRepository, product_repository
+
+logger = logging.getLogger(__name__)
+
+class BulkWriter:
+    """
+    Buffers product rows and writes them in batched transactions
+    
+    Rows are flushed when the buffer reaches `max_rows` or every `flush_interval`
+    seconds, whichever comes first. Products are upserted on their unique EAN.
+    Callbacks registered with `after_flush` run once the rows buffered before
+    them are written (image downloads, whose rows reference the product).
+    A failed flush is retried row by row: rows that still fail are dropped and
+    their EANs recorded in `failed_eans`, the other rows are kept.
+    """
+    
+    def __init__(
+        self,
+        repository: Optional[ProductRepository] = None,
+        max_rows: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ):
+        self.repository = repository or product_repository
+        self.max_rows = max_rows or settings.bulk_write.max_rows
+        self.flush_interval = flush_interval or settings.bulk_write.flush_interval
+        self._products: List[Dict[str, Any]] = []
+        self._after_flush: List[Callable[[], Any]] = []
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Statistics
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_seconds = 0.0
+        # EANs of the rows that could not be written, even on their own
+        self.failed_eans: List[str] = []
+    
+    @property
+    def pending_rows(self) -> int:
+        return len(self._products)
+    
+    async def add_product(self, product_data: Dict[str, Any]):
+        """Buffer a product row"""
+        self._products.append(product_data)
+        if self.pending_rows >= self.max_rows:
+            await self.flush()
+    
+    def after_flush(self, callback: Callable[[], Any]):
+        """Call `callback` once the rows buffered so far have been written"""
+        self._after_flush.append(callback)
+    
+    async def flush(self) -> int:
+        """Write every buffered row"""
+        async with self._lock:
+            products, self._products = self._products, []
+            callbacks, self._after_flush = self._after_flush, []
+            if not products:
+                self._run_callbacks(callbacks)
+                return 0
+            
+            started_at = time.monotonic()
+            try:
+                written = await self.repository.upsert_many(products)
+            except asyncio.CancelledError:
+                self._requeue(products, callbacks)
+                raise
+            except Exception as e:
+                logger.error(f"Bulk flush failed ({len(products)} products), retrying row by row: {str(e)}")
+                written = await self._write_rows(products, callbacks)
+            
+            elapsed = time.monotonic() - started_at
+            self.flushes += 1
+            self.rows_written += written
+            self.flush_seconds += elapsed
+            logger.info(f"Bulk flush: {len(products)} products in {elapsed * 1000:.1f}ms")
+            self._run_callbacks(callbacks)
+            return written
+    
+    def _requeue(self, products: List[Dict[str, Any]], callbacks: List[Callable[[], Any]]):
+        """Put unwritten rows back so that a later flush can write them (cancelled flush)"""
+        self._products = products + self._products
+        self._after_flush = callbacks + self._after_flush
+    
+    async def _write_rows(self, products: List[Dict[str, Any]], callbacks: List[Callable[[], Any]]) -> int:
+        """Write rows one at a time, dropping (and recording) the ones that fail"""
+        written = 0
+        for index, product in enumerate(products):
+            try:
+                written += await self.repository.upsert_many([product])
+            except asyncio.CancelledError:
+                self._requeue(products[index:], callbacks)
+                raise
+            except Exception as e:
+                self.failed_eans.append(product.get('ean'))
+                logger.error(f"Bulk flush dropped product {product.get('ean')}: {str(e)}")
+        return written
+    
+    @staticmethod
+    def _run_callbacks(callbacks: List[Callable[[], Any]]):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"After-flush callback failed: {str(e)}")
+    
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    async def start(self):
+        """Start the interval flush"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+    
+    async def close(self):
+        """Stop the interval flush and write the remaining rows"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+    
+    async def __aenter__(self) -> "BulkWriter":
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
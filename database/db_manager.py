@@ -1,25 +1,84 @@
-from databases import Database
+from databases import Database, DatabaseURL
 import logging
 import asyncio
 from config.settings import settings
+from database.sqlite_engine import SQLiteEngine
 
 logger = logging.getLogger(__name__)
 
+def is_postgres(url: str = settings.DATABASE_URL) -> bool:
+    """Whether a database URL targets PostgreSQL"""
+    return DatabaseURL(url).dialect in ("postgresql", "postgres")
+
+def create_database(url: str):
+    """
+    Create the database instance for a URL
+    
+    - PostgreSQL: databases/asyncpg with a connection pool (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE)
+    - File-based SQLite with the "tuned" profile: SQLiteEngine
+    - Anything else: plain databases.Database
+    """
+    database_url = DatabaseURL(url)
+    
+    if is_postgres(url):
+        return Database(
+            url,
+            min_size=settings.database.pool_min_size,
+            max_size=settings.database.pool_max_size
+        )
+    
+    if (
+        database_url.dialect == "sqlite"
+        and settings.sqlite.profile == "tuned"
+        and database_url.database
+        and database_url.database != ":memory:"
+        and not database_url.options
+    ):
+        return SQLiteEngine(
+            database_url.database,
+            read_pool_size=settings.sqlite.read_pool_size,
+            journal_mode=settings.sqlite.journal_mode,
+            synchronous=settings.sqlite.synchronous,
+            cache_size=settings.sqlite.cache_size,
+            mmap_size=settings.sqlite.mmap_size,
+            busy_timeout_ms=settings.sqlite.busy_timeout_ms
+        )
+    
+    return Database(url)
+
 # Database instance
-database = Database(settings.DATABASE_URL)  # Maintenant, on utilise DATABASE_URL
+database = create_database(settings.DATABASE_URL)  # Maintenant, on utilise DATABASE_URL
+
+async def _ensure_column(table: str, column: str, definition: str):
+    """Add a column to an existing table (tables created by an older version)"""
+    if is_postgres():
+        await database.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+        return
+    
+    columns = [row["name"] for row in await database.fetch_all(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        await database.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
 
 async def create_db_and_tables():
     """Create database and tables if they don't exist"""
     logger.info("Initializing database and tables")
     
+    # Portable DDL: only the auto-increment key and the boolean literal differ
+    if is_postgres():
+        id_column = "id SERIAL PRIMARY KEY"
+        false_value = "FALSE"
+    else:
+        id_column = "id INTEGER PRIMARY KEY AUTOINCREMENT"
+        false_value = "0"
+    
     try:
         if not database.is_connected:
             await database.connect()
-
+        
         # Create products table
-        await database.execute('''
+        await database.execute(f'''
             CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {id_column},
                 ean TEXT NOT NULL UNIQUE,
                 brand TEXT,
                 category TEXT,
@@ -38,18 +97,119 @@ async def create_db_and_tables():
         ''')
         
         # Create product_images table
-        await database.execute('''
+        await database.execute(f'''
             CREATE TABLE IF NOT EXISTS product_images (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {id_column},
                 product_ean TEXT NOT NULL,
                 image_url TEXT,
                 local_path TEXT,
-                is_primary BOOLEAN DEFAULT 0,
+                is_primary BOOLEAN DEFAULT {false_value},
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (product_ean) REFERENCES products(ean) ON DELETE CASCADE
             )
         ''')
         
+        # Content-addressed image files shared by every product_images row referencing them
+        await _ensure_column("product_images", "blob_hash", "TEXT")
+        
+        # Create image_blobs table (one stored file per distinct source image)
+        await database.execute('''
+            CREATE TABLE IF NOT EXISTS image_blobs (
+                hash TEXT PRIMARY KEY,
+                local_path TEXT NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                size_bytes INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Create image_renditions table (resized copies of a blob, per max size and format)
+        await database.execute('''
+            CREATE TABLE IF NOT EXISTS image_renditions (
+                blob_hash TEXT NOT NULL,
+                max_size INTEGER NOT NULL,
+                format TEXT NOT NULL,
+                local_path TEXT NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                size_bytes INTEGER,
+                PRIMARY KEY (blob_hash, max_size, format)
+            )
+        ''')
+        
+        # Create image_sources table (source URL hash -> blob, skips known downloads)
+        await database.execute('''
+            CREATE TABLE IF NOT EXISTS image_sources (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                blob_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Create negative_cache table (EANs not found on any site)
+        await database.execute('''
+            CREATE TABLE IF NOT EXISTS negative_cache (
+                ean TEXT PRIMARY KEY,
+                sites TEXT,
+                miss_count INTEGER DEFAULT 1,
+                last_checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP NOT NULL
+            )
+        ''')
+        
+        # Create tasks table (durable task queue consumed by the workers)
+        await database.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                task_type TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL,
+                message TEXT,
+                results TEXT,
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                last_error TEXT,
+                lease_owner TEXT,
+                lease_expires_at TIMESTAMP,
+                available_at TIMESTAMP NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP
+            )
+        ''')
+        
+        # Create task_results table (results appended as a task progresses, paged by seq;
+        # seq keeps increasing across attempts, only the latest attempt is served)
+        await database.execute('''
+            CREATE TABLE IF NOT EXISTS task_results (
+                task_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                attempt INTEGER NOT NULL DEFAULT 1,
+                result TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (task_id, seq)
+            )
+        ''')
+        await _ensure_column("task_results", "attempt", "INTEGER NOT NULL DEFAULT 1")
+        
+        # Create workers table (health reports of the task workers)
+        await database.execute('''
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                hostname TEXT,
+                pid INTEGER,
+                concurrency INTEGER,
+                active_tasks INTEGER DEFAULT 0,
+                completed INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                status TEXT NOT NULL,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # Create indexes
         await database.execute('''
             CREATE INDEX IF NOT EXISTS idx_ean ON products(ean)
@@ -59,8 +219,26 @@ async def create_db_and_tables():
             CREATE INDEX IF NOT EXISTS idx_brand ON products(brand)
         ''')
         
-        logger.info("Database initialization complete")
+        # Keyset pagination on (created_at, id), with and without brand filter
+        await database.execute('''
+            CREATE INDEX IF NOT EXISTS idx_created_at_id ON products(created_at, id)
+        ''')
+        
+        await database.execute('''
+            CREATE INDEX IF NOT EXISTS idx_brand_created_at_id ON products(brand, created_at, id)
+        ''')
+        
+        await database.execute('''
+            CREATE INDEX IF NOT EXISTS idx_product_images_blob ON product_images(blob_hash)
+        ''')
         
+        # Lease lookup: due pending tasks and expired leases
+        await database.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tasks_status_available ON tasks(status, available_at)
+        ''')
+        
+        logger.info("Database initialization complete")
+    
     except Exception as e:
         logger.error(f"Database initialization error: {str(e)}")
         raise
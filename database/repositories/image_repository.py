@@ -0,0 +1,137 @@
+from typing import Dict, Any, List, Optional
+import logging
+from databases import Database
+from database.db_manager import database
+
+logger = logging.getLogger(__name__)
+
+class ImageRepository:
+    """Stored image files (blobs) keyed by content hash, and the source URLs resolving to them"""
+    
+    def __init__(self, db: Database):
+        self.db = db
+    
+    async def get_blob(self, blob_hash: str) -> Optional[Dict[str, Any]]:
+        """Get a stored image by content hash"""
+        query = "SELECT * FROM image_blobs WHERE hash = :hash"
+        
+        try:
+            blob = await self.db.fetch_one(query, {"hash": blob_hash})
+            return dict(blob) if blob else None
+        except Exception as e:
+            logger.error(f"Error getting image blob: {str(e)}")
+            return None
+    
+    async def get_blob_by_source(self, url_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the stored image previously downloaded from a source URL"""
+        query = """
+            SELECT image_blobs.* FROM image_sources
+            JOIN image_blobs ON image_blobs.hash = image_sources.blob_hash
+            WHERE image_sources.url_hash = :url_hash
+        """
+        
+        try:
+            blob = await self.db.fetch_one(query, {"url_hash": url_hash})
+            return dict(blob) if blob else None
+        except Exception as e:
+            logger.error(f"Error getting image source: {str(e)}")
+            return None
+    
+    async def add_blob(self, blob: Dict[str, Any]) -> bool:
+        """Record a stored image (no-op if another writer stored the same content first)"""
+        query = """
+            INSERT INTO image_blobs (hash, local_path, width, height, size_bytes)
+            VALUES (:hash, :local_path, :width, :height, :size_bytes)
+            ON CONFLICT(hash) DO NOTHING
+        """
+        
+        try:
+            await self.db.execute(query, {
+                column: blob.get(column)
+                for column in ("hash", "local_path", "width", "height", "size_bytes")
+            })
+            return True
+        except Exception as e:
+            logger.error(f"Error adding image blob: {str(e)}")
+            raise
+    
+    async def add_renditions(self, blob_hash: str, renditions: List[Dict[str, Any]]) -> int:
+        """Record the resized copies of a stored image"""
+        if not renditions:
+            return 0
+        
+        columns = ["blob_hash", "max_size", "format", "local_path", "width", "height", "size_bytes"]
+        rows = [{column: rendition.get(column) for column in columns} for rendition in renditions]
+        for row in rows:
+            row["blob_hash"] = blob_hash
+        
+        query = f"""
+            INSERT INTO image_renditions ({", ".join(columns)})
+            VALUES ({", ".join(f":{column}" for column in columns)})
+            ON CONFLICT(blob_hash, max_size, format) DO NOTHING
+        """
+        
+        try:
+            async with self.db.transaction():
+                await self.db.execute_many(query, rows)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error adding image renditions: {str(e)}")
+            raise
+    
+    async def get_renditions(self, blob_hash: str) -> List[Dict[str, Any]]:
+        """Get the resized copies of a stored image, smallest first"""
+        query = "SELECT * FROM image_renditions WHERE blob_hash = :hash ORDER BY max_size, format"
+        
+        try:
+            return [dict(row) for row in await self.db.fetch_all(query, {"hash": blob_hash})]
+        except Exception as e:
+            logger.error(f"Error getting image renditions: {str(e)}")
+            return []
+    
+    async def add_source(self, url_hash: str, url: str, blob_hash: str) -> bool:
+        """Map a source URL to the stored image it resolved to"""
+        query = """
+            INSERT INTO image_sources (url_hash, url, blob_hash)
+            VALUES (:url_hash, :url, :blob_hash)
+            ON CONFLICT(url_hash) DO UPDATE SET blob_hash = excluded.blob_hash
+        """
+        
+        try:
+            await self.db.execute(query, {"url_hash": url_hash, "url": url, "blob_hash": blob_hash})
+            return True
+        except Exception as e:
+            logger.error(f"Error adding image source: {str(e)}")
+            return False
+    
+    async def delete_blob(self, blob_hash: str) -> bool:
+        """
+        Delete a stored image no product image references, with its renditions
+        and the source URLs pointing to it
+        
+        The reference check and the delete are one statement, so a reference
+        added concurrently (by any process) either keeps the image or comes after it.
+        
+        Returns:
+            False if the image is still referenced (or could not be deleted)
+        """
+        query = """
+            DELETE FROM image_blobs
+            WHERE hash = :hash
+              AND NOT EXISTS (SELECT 1 FROM product_images WHERE blob_hash = :hash)
+            RETURNING hash
+        """
+        
+        try:
+            async with self.db.transaction():
+                if await self.db.fetch_val(query, {"hash": blob_hash}) is None:
+                    return False
+                await self.db.execute("DELETE FROM image_renditions WHERE blob_hash = :hash", {"hash": blob_hash})
+                await self.db.execute("DELETE FROM image_sources WHERE blob_hash = :hash", {"hash": blob_hash})
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting image blob: {str(e)}")
+            return False
+
+# Singleton instance
+image_repository = ImageRepository(database)
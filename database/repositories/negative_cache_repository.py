@@ -0,0 +1,89 @@
+from typing import List, Dict, Any, Optional
+import json
+import logging
+from datetime import datetime, timedelta
+from databases import Database
+from database.db_manager import database
+
+logger = logging.getLogger(__name__)
+
+class NegativeCacheRepository:
+    """Stores EANs that no site returned, with an expiry date"""
+    
+    def __init__(self, db: Database):
+        self.db = db
+    
+    async def get(self, ean: str) -> Optional[Dict[str, Any]]:
+        """Get the negative cache entry of an EAN (expired or not)"""
+        query = "SELECT * FROM negative_cache WHERE ean = :ean"
+        
+        try:
+            entry = await self.db.fetch_one(query, {"ean": ean})
+            if not entry:
+                return None
+            
+            entry_dict = dict(entry)
+            entry_dict["sites"] = json.loads(entry_dict["sites"]) if entry_dict.get("sites") else []
+            return entry_dict
+        except Exception as e:
+            logger.error(f"Error getting negative cache entry: {str(e)}")
+            return None
+    
+    async def is_active(self, ean: str) -> bool:
+        """Check whether an EAN is a known miss that has not expired yet"""
+        query = "SELECT 1 FROM negative_cache WHERE ean = :ean AND expires_at > :now"
+        
+        try:
+            return await self.db.fetch_val(query, {"ean": ean, "now": datetime.now()}) is not None
+        except Exception as e:
+            logger.error(f"Error checking negative cache: {str(e)}")
+            return False
+    
+    async def record_miss(self, ean: str, sites: List[str], ttl: timedelta) -> bool:
+        """Record a miss for an EAN and the sites that answered without a product"""
+        now = datetime.now()
+        query = """
+            INSERT INTO negative_cache (ean, sites, miss_count, last_checked_at, expires_at)
+            VALUES (:ean, :sites, 1, :now, :expires_at)
+            ON CONFLICT(ean) DO UPDATE SET
+                sites = excluded.sites,
+                miss_count = negative_cache.miss_count + 1,
+                last_checked_at = excluded.last_checked_at,
+                expires_at = excluded.expires_at
+        """
+        
+        try:
+            await self.db.execute(query, {
+                "ean": ean,
+                "sites": json.dumps(sites),
+                "now": now,
+                "expires_at": now + ttl
+            })
+            return True
+        except Exception as e:
+            logger.error(f"Error recording negative cache entry: {str(e)}")
+            return False
+    
+    async def clear(self, ean: str) -> bool:
+        """Remove an EAN from the negative cache (e.g. once it has been found)"""
+        try:
+            await self.db.execute("DELETE FROM negative_cache WHERE ean = :ean", {"ean": ean})
+            return True
+        except Exception as e:
+            logger.error(f"Error clearing negative cache entry: {str(e)}")
+            return False
+    
+    async def purge_expired(self) -> bool:
+        """Delete expired entries"""
+        try:
+            await self.db.execute(
+                "DELETE FROM negative_cache WHERE expires_at <= :now",
+                {"now": datetime.now()}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error purging negative cache: {str(e)}")
+            return False
+
+# Singleton instance
+negative_cache_repository = NegativeCacheRepository(database)
@@ -1,14 +1,48 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import base64
+import json
 import logging
+import os
+import sys
 from datetime import datetime
 from databases import Database
-from database.db_manager import database
+from config.settings import settings
+from database.db_manager import database, is_postgres
+from utils.lru_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Max EANs per IN (...) clause, below SQLite's default bound parameter limit (999)
+IN_CLAUSE_CHUNK_SIZE = 500
+
+def _in_clause(prefix: str, values: List[Any]) -> Tuple[str, Dict[str, Any]]:
+    """Build named placeholders and params for an IN (...) clause"""
+    params = {f"{prefix}_{i}": value for i, value in enumerate(values)}
+    placeholders = ", ".join(f":{name}" for name in params)
+    return placeholders, params
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string starting with `prefix` (None if there is none)"""
+    # The last character that can be incremented: trailing U+10FFFF have no successor
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+def public_image_url(local_path: Optional[str]) -> Optional[str]:
+    """Public URL of a file under the image storage folder"""
+    if not local_path:
+        return None
+    relative = os.path.relpath(local_path, settings.image.storage_path)
+    if relative.startswith(".."):
+        return None
+    return f"{settings.image.base_url.rstrip('/')}/{relative.replace(os.sep, '/')}"
+
 class ProductRepository:
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, cache: Optional[LRUCache] = None):
         self.db = db
+        # Write-through cache of get_by_ean results, invalidated on every product/image write
+        self.cache = cache or LRUCache(settings.product_cache.max_size, settings.product_cache.ttl)
     
     async def create(self, product_data: Dict[str, Any]) -> int:
         """Create a new product in the database"""
@@ -36,11 +70,51 @@ class ProductRepository:
         
         try:
             product_id = await self.db.execute(query, filtered_data)
+            self.cache.invalidate(filtered_data.get('ean'))
             return product_id
         except Exception as e:
             logger.error(f"Error creating product: {str(e)}")
             raise
     
+    async def upsert_many(self, products: List[Dict[str, Any]]) -> int:
+        """Insert or update several products in one transaction (upsert on the unique ean)"""
+        if not products:
+            return 0
+        
+        columns = [
+            'ean', 'brand', 'category', 'name', 'description', 'color', 
+            'size', 'long_description', 'source', 'source_url', 'price', 'box_number'
+        ]
+        
+        now = datetime.now()
+        rows = []
+        for product_data in products:
+            row = {column: product_data.get(column) for column in columns}
+            row['created_at'] = now
+            row['updated_at'] = now
+            rows.append(row)
+        
+        # Missing values (None) never overwrite existing data, created_at is kept
+        update_clause = ", ".join(
+            f"{column} = COALESCE(excluded.{column}, products.{column})"
+            for column in columns if column != 'ean'
+        )
+        query = f"""
+            INSERT INTO products ({", ".join(rows[0].keys())})
+            VALUES ({", ".join(f":{column}" for column in rows[0].keys())})
+            ON CONFLICT(ean) DO UPDATE SET {update_clause}, updated_at = excluded.updated_at
+        """
+        
+        try:
+            async with self.db.transaction():
+                await self.db.execute_many(query, rows)
+            for row in rows:
+                self.cache.invalidate(row['ean'])
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error upserting products: {str(e)}")
+            raise
+    
     async def update(self, ean: str, product_data: Dict[str, Any]) -> bool:
         """Update a product in the database"""
         # Filter valid columns
@@ -66,6 +140,7 @@ class ProductRepository:
         try:
             params = {**filtered_data, "ean": ean}
             await self.db.execute(query, params)
+            self.cache.invalidate(ean)
             return True
         except Exception as e:
             logger.error(f"Error updating product: {str(e)}")
@@ -73,7 +148,12 @@ class ProductRepository:
     
     async def get_by_ean(self, ean: str) -> Optional[Dict[str, Any]]:
         """Get a product by EAN"""
+        cached_product = self.cache.get(ean)
+        if cached_product is not None:
+            return cached_product
+        
         query = "SELECT * FROM products WHERE ean = :ean"
+        generation = self.cache.generation
         
         try:
             product = await self.db.fetch_one(query, {"ean": ean})
@@ -85,48 +165,144 @@ class ProductRepository:
             product_dict = dict(product)
             product_dict["images"] = await self.get_product_images(ean)
             
+            self.cache.set(ean, product_dict, generation=generation)
             return product_dict
         except Exception as e:
             logger.error(f"Error getting product by EAN: {str(e)}")
             return None
     
-    async def get_all(self, limit: int = 100, offset: int = 0, brand: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all products with pagination and optional filtering"""
-        try:
-            params = {"limit": limit, "offset": offset}
-            
-            if brand:
-                query = """
-                    SELECT * FROM products
-                    WHERE brand LIKE :brand
-                    ORDER BY created_at DESC
-                    LIMIT :limit OFFSET :offset
-                """
-                params["brand"] = f"%{brand}%"
+    async def get_all(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        brand: Optional[str] = None,
+        brand_match: str = "prefix",
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all products with pagination and optional filtering
+        
+        Args:
+            limit: Page size
+            offset: Offset pagination (ignored when a cursor is given)
+            brand: Brand filter
+            brand_match: "prefix" (default) or "exact", both using the brand index, or "contains" (LIKE, full scan)
+            cursor: Keyset cursor returned by encode_cursor for the last product of the previous page
+        """
+        conditions = []
+        params: Dict[str, Any] = {"limit": limit}
+        
+        if brand:
+            if brand_match == "exact":
+                conditions.append("brand = :brand")
+                params["brand"] = brand
+            elif brand_match == "prefix":
+                # Range scan instead of LIKE 'x%' so SQLite can use the (case-sensitive) index
+                conditions.append("brand >= :brand")
+                params["brand"] = brand
+                brand_upper = _prefix_upper_bound(brand)
+                if brand_upper is not None:
+                    conditions.append("brand < :brand_upper")
+                    params["brand_upper"] = brand_upper
             else:
-                query = """
-                    SELECT * FROM products
-                    ORDER BY created_at DESC
-                    LIMIT :limit OFFSET :offset
-                """
-            
+                conditions.append("brand LIKE :brand")
+                params["brand"] = f"%{brand}%"
+        
+        if cursor:
+            created_at, product_id = self.decode_cursor(cursor)
+            conditions.append("(created_at < :cursor_created_at OR (created_at = :cursor_created_at AND id < :cursor_id))")
+            # SQLite compares the stored text (with or without fractional seconds, as written):
+            # the cursor must carry that exact text to compare like ORDER BY does
+            params["cursor_created_at"] = datetime.fromisoformat(created_at) if is_postgres() else created_at
+            params["cursor_id"] = product_id
+        
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        pagination_clause = "LIMIT :limit"
+        if not cursor:
+            pagination_clause += " OFFSET :offset"
+            params["offset"] = offset
+        
+        query = f"""
+            SELECT * FROM products
+            {where_clause}
+            ORDER BY created_at DESC, id DESC
+            {pagination_clause}
+        """
+        
+        try:
             products = await self.db.fetch_all(query, params)
             
             if not products:
                 return []
             
-            # Get images for each product
-            result = []
-            for product in products:
-                product_dict = dict(product)
-                product_dict["images"] = await self.get_product_images(product_dict["ean"])
-                result.append(product_dict)
+            # Load the images of the whole page in one query
+            result = [dict(product) for product in products]
+            images_by_ean = await self.get_images_for_eans([product["ean"] for product in result])
+            for product_dict in result:
+                product_dict["images"] = images_by_ean.get(product_dict["ean"], [])
             
             return result
         except Exception as e:
             logger.error(f"Error getting all products: {str(e)}")
             return []
     
+    @staticmethod
+    def encode_cursor(product: Dict[str, Any]) -> str:
+        """Build the opaque keyset cursor pointing after a product (created_at kept as stored)"""
+        created_at = product["created_at"]
+        if isinstance(created_at, datetime):
+            created_at = created_at.isoformat(sep=" ")
+        payload = json.dumps([str(created_at), product["id"]])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, int]:
+        """Decode a keyset cursor, raises ValueError if it is malformed"""
+        try:
+            created_at, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            datetime.fromisoformat(created_at)
+            return created_at, int(product_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+    
+    async def get_many_by_ean(self, eans: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several products by EAN (cache first, then one query per chunk for the rest)"""
+        products: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        
+        for ean in dict.fromkeys(eans):
+            cached_product = self.cache.get(ean)
+            if cached_product is not None:
+                products[ean] = cached_product
+            else:
+                missing.append(ean)
+        
+        if not missing:
+            return products
+        
+        generation = self.cache.generation
+        
+        try:
+            loaded = []
+            for start in range(0, len(missing), IN_CLAUSE_CHUNK_SIZE):
+                placeholders, params = _in_clause("ean", missing[start:start + IN_CLAUSE_CHUNK_SIZE])
+                rows = await self.db.fetch_all(
+                    f"SELECT * FROM products WHERE ean IN ({placeholders})",
+                    params
+                )
+                loaded.extend(dict(row) for row in rows)
+            
+            images_by_ean = await self.get_images_for_eans([product["ean"] for product in loaded])
+            for product_dict in loaded:
+                product_dict["images"] = images_by_ean.get(product_dict["ean"], [])
+                products[product_dict["ean"]] = product_dict
+                self.cache.set(product_dict["ean"], product_dict, generation=generation)
+            
+            return products
+        except Exception as e:
+            logger.error(f"Error getting products by EAN: {str(e)}")
+            return products
+    
     async def delete(self, ean: str) -> bool:
         """Delete a product by EAN"""
         try:
@@ -142,6 +318,7 @@ class ProductRepository:
                 {"ean": ean}
             )
             
+            self.cache.invalidate(ean)
             return True
         except Exception as e:
             logger.error(f"Error deleting product: {str(e)}")
@@ -154,7 +331,7 @@ class ProductRepository:
             raise ValueError("product_ean is required")
         
         valid_columns = [
-            'product_ean', 'image_url', 'local_path', 'is_primary'
+            'product_ean', 'image_url', 'local_path', 'is_primary', 'blob_hash'
         ]
         
         filtered_data = {k: v for k, v in image_data.items() if k in valid_columns}
@@ -171,6 +348,7 @@ class ProductRepository:
         
         try:
             image_id = await self.db.execute(query, filtered_data)
+            self.cache.invalidate(filtered_data["product_ean"])
             return image_id
         except Exception as e:
             logger.error(f"Error adding product image: {str(e)}")
@@ -182,11 +360,60 @@ class ProductRepository:
         
         try:
             images = await self.db.fetch_all(query, {"ean": ean})
-            return [dict(img) for img in images] if images else []
+            return await self._with_renditions([dict(img) for img in images])
         except Exception as e:
             logger.error(f"Error getting product images: {str(e)}")
             return []
     
+    async def get_images_for_eans(self, eans: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the images of several products, grouped by EAN"""
+        images_by_ean: Dict[str, List[Dict[str, Any]]] = {}
+        unique_eans = list(dict.fromkeys(eans))
+        
+        try:
+            for start in range(0, len(unique_eans), IN_CLAUSE_CHUNK_SIZE):
+                placeholders, params = _in_clause("ean", unique_eans[start:start + IN_CLAUSE_CHUNK_SIZE])
+                images = await self.db.fetch_all(
+                    f"""
+                        SELECT * FROM product_images
+                        WHERE product_ean IN ({placeholders})
+                        ORDER BY is_primary DESC, id ASC
+                    """,
+                    params
+                )
+                for image_dict in await self._with_renditions([dict(img) for img in images]):
+                    images_by_ean.setdefault(image_dict["product_ean"], []).append(image_dict)
+            
+            return images_by_ean
+        except Exception as e:
+            logger.error(f"Error getting product images: {str(e)}")
+            return images_by_ean
+    
+    async def _with_renditions(self, images: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add the public URL and the resized copies (smallest first) to image rows"""
+        blob_hashes = list(dict.fromkeys(image["blob_hash"] for image in images if image.get("blob_hash")))
+        renditions_by_hash: Dict[str, List[Dict[str, Any]]] = {}
+        
+        for start in range(0, len(blob_hashes), IN_CLAUSE_CHUNK_SIZE):
+            placeholders, params = _in_clause("hash", blob_hashes[start:start + IN_CLAUSE_CHUNK_SIZE])
+            rows = await self.db.fetch_all(
+                f"""
+                    SELECT * FROM image_renditions
+                    WHERE blob_hash IN ({placeholders})
+                    ORDER BY max_size, format
+                """,
+                params
+            )
+            for row in rows:
+                rendition = dict(row)
+                rendition["url"] = public_image_url(rendition["local_path"])
+                renditions_by_hash.setdefault(rendition["blob_hash"], []).append(rendition)
+        
+        for image in images:
+            image["url"] = public_image_url(image.get("local_path"))
+            image["renditions"] = renditions_by_hash.get(image.get("blob_hash"), [])
+        return images
+    
     async def get_product_image(self, image_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific image by ID"""
         query = "SELECT * FROM product_images WHERE id = :id"
@@ -203,16 +430,17 @@ class ProductRepository:
         try:
             # Reset all images for this product
             await self.db.execute(
-                "UPDATE product_images SET is_primary = 0 WHERE product_ean = :ean",
-                {"ean": ean}
+                "UPDATE product_images SET is_primary = :is_primary WHERE product_ean = :ean",
+                {"is_primary": False, "ean": ean}
             )
             
             # Set this image as primary
             await self.db.execute(
-                "UPDATE product_images SET is_primary = 1 WHERE id = :id AND product_ean = :ean",
-                {"id": image_id, "ean": ean}
+                "UPDATE product_images SET is_primary = :is_primary WHERE id = :id AND product_ean = :ean",
+                {"is_primary": True, "id": image_id, "ean": ean}
             )
             
+            self.cache.invalidate(ean)
             return True
         except Exception as e:
             logger.error(f"Error setting primary image: {str(e)}")
@@ -221,16 +449,33 @@ class ProductRepository:
     async def delete_product_image(self, image_id: int) -> bool:
         """Delete a product image"""
         try:
+            product_ean = await self.db.fetch_val(
+                "SELECT product_ean FROM product_images WHERE id = :id",
+                {"id": image_id}
+            )
+            
             await self.db.execute(
                 "DELETE FROM product_images WHERE id = :id",
                 {"id": image_id}
             )
             
+            if product_ean:
+                self.cache.invalidate(product_ean)
             return True
         except Exception as e:
             logger.error(f"Error deleting product image: {str(e)}")
             return False
     
+    async def has_blob_image(self, ean: str, blob_hash: str) -> bool:
+        """Check whether a product already references a stored image"""
+        query = "SELECT 1 FROM product_images WHERE product_ean = :ean AND blob_hash = :blob_hash"
+        
+        try:
+            return await self.db.fetch_val(query, {"ean": ean, "blob_hash": blob_hash}) is not None
+        except Exception as e:
+            logger.error(f"Error checking product image: {str(e)}")
+            return False
+    
     async def count_product_images(self, ean: str) -> int:
         """Count the number of images for a product"""
         query = "SELECT COUNT(*) FROM product_images WHERE product_ean = :ean"
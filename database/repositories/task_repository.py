@@ -0,0 +1,420 @@
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import logging
+from datetime import datetime, timedelta
+from databases import Database
+from database.db_manager import database, is_postgres
+
+logger = logging.getLogger(__name__)
+
+# Task statuses ("failed" is the dead letter: attempts exhausted, no more retries)
+TASK_PENDING = "pending"
+TASK_PROCESSING = "processing"
+TASK_COMPLETED = "completed"
+TASK_FAILED = "failed"
+
+class TaskRepository:
+    """Durable task queue with leases, visibility timeout, retries and dead-lettering"""
+    
+    def __init__(self, db: Database):
+        self.db = db
+    
+    @staticmethod
+    def _to_dict(row) -> Dict[str, Any]:
+        task = dict(row)
+        task["payload"] = json.loads(task["payload"]) if task.get("payload") else {}
+        task["results"] = json.loads(task["results"]) if task.get("results") else None
+        return task
+    
+    async def create(
+        self,
+        task_id: str,
+        task_type: str,
+        payload: Dict[str, Any],
+        message: str,
+        max_attempts: int
+    ) -> str:
+        """Enqueue a new pending task"""
+        now = datetime.now()
+        query = """
+            INSERT INTO tasks (id, task_type, payload, status, message, attempts, max_attempts,
+                               available_at, created_at, updated_at)
+            VALUES (:id, :task_type, :payload, :status, :message, 0, :max_attempts,
+                    :now, :now, :now)
+        """
+        
+        try:
+            await self.db.execute(query, {
+                "id": task_id,
+                "task_type": task_type,
+                "payload": json.dumps(payload),
+                "status": TASK_PENDING,
+                "message": message,
+                "max_attempts": max_attempts,
+                "now": now
+            })
+            return task_id
+        except Exception as e:
+            logger.error(f"Error creating task: {str(e)}")
+            raise
+    
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get a task by id"""
+        try:
+            task = await self.db.fetch_one("SELECT * FROM tasks WHERE id = :id", {"id": task_id})
+            return self._to_dict(task) if task else None
+        except Exception as e:
+            logger.error(f"Error getting task: {str(e)}")
+            return None
+    
+    async def lease(self, owner: str, visibility_timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest available task
+        
+        A task is available when it is pending and due, or when it is processing
+        but its lease expired (the worker died). The lease must be renewed with
+        extend_lease before `visibility_timeout` seconds, otherwise another worker
+        may take the task over.
+        """
+        now = datetime.now()
+        # Let concurrent PostgreSQL workers skip rows already being claimed
+        lock_clause = "FOR UPDATE SKIP LOCKED" if is_postgres() else ""
+        query = f"""
+            UPDATE tasks
+            SET status = :processing, lease_owner = :owner, lease_expires_at = :lease_expires_at,
+                attempts = attempts + 1, updated_at = :now
+            WHERE id = (
+                SELECT id FROM tasks
+                WHERE attempts < max_attempts
+                  AND ((status = :pending AND available_at <= :now)
+                       OR (status = :processing AND lease_expires_at <= :now))
+                ORDER BY available_at, created_at
+                LIMIT 1
+                {lock_clause}
+            )
+            RETURNING *
+        """
+        
+        try:
+            await self.dead_letter_expired()
+            async with self.db.transaction():
+                task = await self.db.fetch_one(query, {
+                    "processing": TASK_PROCESSING,
+                    "pending": TASK_PENDING,
+                    "owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=visibility_timeout),
+                    "now": now
+                })
+            return self._to_dict(task) if task else None
+        except Exception as e:
+            logger.error(f"Error leasing task: {str(e)}")
+            return None
+    
+    async def extend_lease(self, task_id: str, owner: str, visibility_timeout: float) -> Optional[bool]:
+        """
+        Renew the lease of a task still held by `owner`
+        
+        Returns:
+            True if the lease was renewed, False if `owner` no longer holds it
+            (expired and taken over, or finished), None on database error
+        """
+        now = datetime.now()
+        try:
+            # The UPDATE goes through the writer connection (SQLiteEngine) like lease()
+            async with self.db.transaction():
+                renewed = await self.db.fetch_val(
+                    """
+                        UPDATE tasks SET lease_expires_at = :lease_expires_at, updated_at = :now
+                        WHERE id = :id AND lease_owner = :owner AND status = :processing
+                        RETURNING id
+                    """,
+                    {
+                        "id": task_id,
+                        "owner": owner,
+                        "processing": TASK_PROCESSING,
+                        "lease_expires_at": now + timedelta(seconds=visibility_timeout),
+                        "now": now
+                    }
+                )
+            return renewed is not None
+        except Exception as e:
+            logger.error(f"Error extending task lease: {str(e)}")
+            return None
+    
+    async def update_message(self, task_id: str, owner: str, message: str) -> bool:
+        """Update the progress message of a task held by `owner`"""
+        try:
+            await self.db.execute(
+                "UPDATE tasks SET message = :message, updated_at = :now WHERE id = :id AND lease_owner = :owner",
+                {"id": task_id, "owner": owner, "message": message, "now": datetime.now()}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error updating task message: {str(e)}")
+            return False
+    
+    async def complete(self, task_id: str, owner: str, message: str, results: Optional[List[Any]] = None) -> bool:
+        """
+        Mark a task held by `owner` as completed
+        
+        Results are normally appended to task_results while the task runs; `results`
+        stores an inline list on the task row instead (rows written before paging).
+        """
+        now = datetime.now()
+        try:
+            await self.db.execute(
+                """
+                    UPDATE tasks
+                    SET status = :completed, message = :message, results = :results,
+                        lease_owner = NULL, lease_expires_at = NULL, completed_at = :now, updated_at = :now
+                    WHERE id = :id AND lease_owner = :owner
+                """,
+                {
+                    "id": task_id,
+                    "owner": owner,
+                    "completed": TASK_COMPLETED,
+                    "message": message,
+                    "results": json.dumps(results, default=str) if results is not None else None,
+                    "now": now
+                }
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error completing task: {str(e)}")
+            return False
+    
+    async def fail(self, task_id: str, owner: str, error: str, retry_delay: float) -> Optional[str]:
+        """
+        Record a failed attempt: the task goes back to pending after `retry_delay`
+        seconds, or to the dead letter (failed) once its attempts are exhausted
+        
+        Returns:
+            The new status of the task
+        """
+        now = datetime.now()
+        try:
+            async with self.db.transaction():
+                task = await self.db.fetch_one(
+                    "SELECT attempts, max_attempts FROM tasks WHERE id = :id AND lease_owner = :owner",
+                    {"id": task_id, "owner": owner}
+                )
+                if not task:
+                    return None
+                
+                exhausted = task["attempts"] >= task["max_attempts"]
+                status = TASK_FAILED if exhausted else TASK_PENDING
+                message = (
+                    f"Échec définitif après {task['attempts']} tentative(s): {error}"
+                    if exhausted else
+                    f"Tentative {task['attempts']}/{task['max_attempts']} échouée, nouvel essai prévu: {error}"
+                )
+                
+                await self.db.execute(
+                    """
+                        UPDATE tasks
+                        SET status = :status, message = :message, last_error = :error,
+                            lease_owner = NULL, lease_expires_at = NULL, available_at = :available_at,
+                            completed_at = :completed_at, updated_at = :now
+                        WHERE id = :id
+                    """,
+                    {
+                        "id": task_id,
+                        "status": status,
+                        "message": message,
+                        "error": error,
+                        "available_at": now + timedelta(seconds=retry_delay),
+                        "completed_at": now if exhausted else None,
+                        "now": now
+                    }
+                )
+            return status
+        except Exception as e:
+            logger.error(f"Error failing task: {str(e)}")
+            return None
+    
+    async def release(self, task_id: str, owner: str) -> bool:
+        """Give back an unfinished task (worker shutdown) without counting the attempt"""
+        now = datetime.now()
+        try:
+            await self.db.execute(
+                """
+                    UPDATE tasks
+                    SET status = :pending, attempts = attempts - 1, lease_owner = NULL, lease_expires_at = NULL,
+                        available_at = :now, updated_at = :now
+                    WHERE id = :id AND lease_owner = :owner AND status = :processing
+                """,
+                {"id": task_id, "owner": owner, "pending": TASK_PENDING, "processing": TASK_PROCESSING, "now": now}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error releasing task: {str(e)}")
+            return False
+    
+    async def dead_letter_expired(self) -> bool:
+        """Dead-letter tasks whose lease expired on their last allowed attempt"""
+        now = datetime.now()
+        try:
+            await self.db.execute(
+                """
+                    UPDATE tasks
+                    SET status = :failed, message = :message, lease_owner = NULL, lease_expires_at = NULL,
+                        completed_at = :now, updated_at = :now
+                    WHERE status = :processing AND lease_expires_at <= :now AND attempts >= max_attempts
+                """,
+                {
+                    "failed": TASK_FAILED,
+                    "processing": TASK_PROCESSING,
+                    "message": "Échec définitif: délai de traitement dépassé à la dernière tentative",
+                    "now": now
+                }
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error dead-lettering expired tasks: {str(e)}")
+            return False
+    
+    async def get_dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """List dead-lettered tasks, most recent first"""
+        try:
+            tasks = await self.db.fetch_all(
+                "SELECT * FROM tasks WHERE status = :failed ORDER BY completed_at DESC LIMIT :limit",
+                {"failed": TASK_FAILED, "limit": limit}
+            )
+            return [self._to_dict(task) for task in tasks]
+        except Exception as e:
+            logger.error(f"Error getting dead-lettered tasks: {str(e)}")
+            return []
+    
+    async def requeue(self, task_id: str, max_attempts: int) -> bool:
+        """Send a dead-lettered task back to the queue with a fresh attempt budget"""
+        now = datetime.now()
+        try:
+            await self.db.execute(
+                """
+                    UPDATE tasks
+                    SET status = :pending, attempts = 0, max_attempts = :max_attempts,
+                        available_at = :now, completed_at = NULL, updated_at = :now
+                    WHERE id = :id AND status = :failed
+                """,
+                {"id": task_id, "pending": TASK_PENDING, "failed": TASK_FAILED, "max_attempts": max_attempts, "now": now}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error requeuing task: {str(e)}")
+            return False
+    
+    async def purge_finished(self, older_than: timedelta) -> bool:
+        """Delete completed tasks older than the retention period, with their results"""
+        params = {"completed": TASK_COMPLETED, "limit": datetime.now() - older_than}
+        try:
+            async with self.db.transaction():
+                await self.db.execute(
+                    """
+                        DELETE FROM task_results WHERE task_id IN (
+                            SELECT id FROM tasks WHERE status = :completed AND completed_at <= :limit
+                        )
+                    """,
+                    params
+                )
+                await self.db.execute(
+                    "DELETE FROM tasks WHERE status = :completed AND completed_at <= :limit",
+                    params
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error purging tasks: {str(e)}")
+            return False
+
+    async def start_results(self, task_id: str) -> Tuple[int, int]:
+        """
+        Attempt number and last seq for the results of a new attempt of a task
+        
+        Results are numbered after those of the previous attempts, so that a client
+        resuming after a seq never skips the results of a retry.
+        """
+        try:
+            row = await self.db.fetch_one(
+                "SELECT MAX(attempt) AS attempt, MAX(seq) AS seq FROM task_results WHERE task_id = :task_id",
+                {"task_id": task_id}
+            )
+            return (row["attempt"] or 0) + 1, row["seq"] or 0
+        except Exception as e:
+            logger.error(f"Error starting task results: {str(e)}")
+            raise
+    
+    async def append_results(self, task_id: str, attempt: int, first_seq: int, results: List[Any]) -> int:
+        """Append results of an attempt to a task, numbered from `first_seq`"""
+        if not results:
+            return 0
+        now = datetime.now()
+        try:
+            await self.db.execute_many(
+                """
+                    INSERT INTO task_results (task_id, seq, attempt, result, created_at)
+                    VALUES (:task_id, :seq, :attempt, :result, :now)
+                """,
+                [
+                    {
+                        "task_id": task_id,
+                        "seq": first_seq + i,
+                        "attempt": attempt,
+                        "result": json.dumps(result, default=str),
+                        "now": now
+                    }
+                    for i, result in enumerate(results)
+                ]
+            )
+            return len(results)
+        except Exception as e:
+            logger.error(f"Error appending task results: {str(e)}")
+            raise
+    
+    async def get_results(self, task_id: str, after: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Page of results of the latest attempt with seq > `after`, in order:
+        [{"seq", "attempt", "result"}]
+        """
+        try:
+            rows = await self.db.fetch_all(
+                """
+                    SELECT seq, attempt, result FROM task_results
+                    WHERE task_id = :task_id AND seq > :after
+                      AND attempt = (SELECT MAX(attempt) FROM task_results WHERE task_id = :task_id)
+                    ORDER BY seq
+                    LIMIT :limit
+                """,
+                {"task_id": task_id, "after": after, "limit": limit}
+            )
+            return [{"seq": row["seq"], "attempt": row["attempt"], "result": json.loads(row["result"])} for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting task results: {str(e)}")
+            return []
+    
+    async def get_result_attempt(self, task_id: str, seq: int) -> Optional[int]:
+        """Attempt that produced the result `seq` of a task"""
+        try:
+            return await self.db.fetch_val(
+                "SELECT attempt FROM task_results WHERE task_id = :task_id AND seq = :seq",
+                {"task_id": task_id, "seq": seq}
+            )
+        except Exception as e:
+            logger.error(f"Error getting task result attempt: {str(e)}")
+            return None
+    
+    async def count_results(self, task_id: str) -> int:
+        """Number of results of the latest attempt of a task"""
+        try:
+            return await self.db.fetch_val(
+                """
+                    SELECT COUNT(*) FROM task_results
+                    WHERE task_id = :task_id
+                      AND attempt = (SELECT MAX(attempt) FROM task_results WHERE task_id = :task_id)
+                """,
+                {"task_id": task_id}
+            ) or 0
+        except Exception as e:
+            logger.error(f"Error counting task results: {str(e)}")
+            return 0
+
+# Singleton instance
+task_repository = TaskRepository(database)
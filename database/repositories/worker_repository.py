@@ -0,0 +1,78 @@
+from typing import List, Dict, Any
+import logging
+from datetime import datetime, timedelta
+from databases import Database
+from database.db_manager import database
+
+logger = logging.getLogger(__name__)
+
+class WorkerRepository:
+    """Health reports of the task workers, one row per worker process"""
+    
+    def __init__(self, db: Database):
+        self.db = db
+    
+    async def report(self, stats: Dict[str, Any], status: str) -> bool:
+        """Record the current state of a worker"""
+        now = datetime.now()
+        query = """
+            INSERT INTO workers (worker_id, hostname, pid, concurrency, active_tasks, completed, failed,
+                                 status, started_at, last_seen_at)
+            VALUES (:worker_id, :hostname, :pid, :concurrency, :active_tasks, :completed, :failed,
+                    :status, :now, :now)
+            ON CONFLICT(worker_id) DO UPDATE SET
+                active_tasks = excluded.active_tasks,
+                completed = excluded.completed,
+                failed = excluded.failed,
+                status = excluded.status,
+                last_seen_at = excluded.last_seen_at
+        """
+        
+        try:
+            await self.db.execute(query, {
+                "worker_id": stats["worker_id"],
+                "hostname": stats["hostname"],
+                "pid": stats["pid"],
+                "concurrency": stats["concurrency"],
+                "active_tasks": stats["active_tasks"],
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "status": status,
+                "now": now
+            })
+            return True
+        except Exception as e:
+            logger.error(f"Error reporting worker health: {str(e)}")
+            return False
+    
+    async def get_all(self, stale_after: timedelta) -> List[Dict[str, Any]]:
+        """
+        List the workers, each flagged `alive` when it reported within `stale_after`
+        """
+        query = """
+            SELECT *, (status != 'stopped' AND last_seen_at >= :threshold) AS alive
+            FROM workers
+            ORDER BY started_at DESC
+        """
+        
+        try:
+            workers = await self.db.fetch_all(query, {"threshold": datetime.now() - stale_after})
+            return [{**dict(worker), "alive": bool(worker["alive"])} for worker in workers]
+        except Exception as e:
+            logger.error(f"Error getting workers: {str(e)}")
+            return []
+    
+    async def purge_stale(self, older_than: timedelta) -> bool:
+        """Delete workers that have not reported for a long time"""
+        try:
+            await self.db.execute(
+                "DELETE FROM workers WHERE last_seen_at <= :limit",
+                {"limit": datetime.now() - older_than}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error purging workers: {str(e)}")
+            return False
+
+# Singleton instance
+worker_repository = WorkerRepository(database)
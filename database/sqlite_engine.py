@@ -0,0 +1,219 @@
+from typing import Any, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import asyncio
+import logging
+import sqlite3
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Same textual format as SQLAlchemy's SQLite DATETIME, so stored timestamps stay comparable
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+def _bind(values: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bind datetimes as text on this engine's statements only (no process-wide sqlite3 adapter)"""
+    if not values:
+        return {}
+    return {
+        name: value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else value
+        for name, value in values.items()
+    }
+
+# Task owning the running transaction and its writer connection, if any. Tasks created
+# inside a transaction inherit the context: the owner check keeps them out of it
+_transaction_connection: ContextVar[Optional[Tuple[asyncio.Task, aiosqlite.Connection]]] = ContextVar(
+    "sqlite_transaction_connection", default=None
+)
+
+def _current_transaction() -> Optional[aiosqlite.Connection]:
+    """Writer connection of the transaction opened by the current task"""
+    transaction = _transaction_connection.get()
+    if transaction is None or transaction[0] is not asyncio.current_task():
+        return None
+    return transaction[1]
+
+class SQLiteEngine:
+    """
+    Tuned SQLite access with a pool of read connections and a single writer
+    
+    Exposes the subset of the `databases.Database` API used by the repositories
+    (execute, execute_many, fetch_one, fetch_all, fetch_val, transaction). Every
+    connection is opened once with the configured PRAGMAs (WAL, synchronous,
+    cache_size, mmap_size, busy_timeout). Reads are spread over the read pool,
+    while all writes go through one connection behind a FIFO lock, so that
+    concurrent writers queue up instead of failing with "database is locked".
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        read_pool_size: int = 4,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        cache_size: int = -65536,
+        mmap_size: int = 268435456,
+        busy_timeout_ms: int = 5000
+    ):
+        self.path = path
+        self.read_pool_size = max(1, read_pool_size)
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._read_pool: Optional[asyncio.Queue] = None
+        self._write_lock = asyncio.Lock()
+        self._connect_lock = asyncio.Lock()
+        self._queued_writes = 0
+        
+        # Statistics
+        self.reads = 0
+        self.writes = 0
+    
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None
+    
+    async def _open_connection(self, read_only: bool = False) -> aiosqlite.Connection:
+        connection = aiosqlite.connect(self.path, isolation_level=None)
+        # Scripts that never disconnect must not hang on exit waiting for the connection thread
+        connection.daemon = True
+        await connection
+        connection.row_factory = sqlite3.Row
+        await connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        await connection.execute(f"PRAGMA synchronous = {self.synchronous}")
+        await connection.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        await connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        if read_only:
+            await connection.execute("PRAGMA query_only = 1")
+        return connection
+    
+    async def connect(self):
+        """Open the writer connection (switching the journal mode) and the read pool"""
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+            
+            writer = await self._open_connection()
+            # The journal mode is persistent and must be set before the readers attach
+            async with writer.execute(f"PRAGMA journal_mode = {self.journal_mode}") as cursor:
+                row = await cursor.fetchone()
+            logger.info(f"SQLite engine connected to {self.path} (journal_mode={row[0] if row else '?'})")
+            
+            self._read_pool = asyncio.Queue()
+            for _ in range(self.read_pool_size):
+                reader = await self._open_connection(read_only=True)
+                self._readers.append(reader)
+                self._read_pool.put_nowait(reader)
+            self._writer = writer
+    
+    async def disconnect(self):
+        """Close every connection"""
+        async with self._connect_lock:
+            for reader in self._readers:
+                await reader.close()
+            self._readers = []
+            self._read_pool = None
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+    
+    async def _ensure_connected(self):
+        if not self.is_connected:
+            await self.connect()
+    
+    @asynccontextmanager
+    async def _reader(self):
+        """Borrow a read connection, or the writer when called inside a transaction"""
+        transaction_connection = _current_transaction()
+        if transaction_connection is not None:
+            yield transaction_connection
+            return
+        
+        await self._ensure_connected()
+        connection = await self._read_pool.get()
+        try:
+            self.reads += 1
+            yield connection
+        finally:
+            self._read_pool.put_nowait(connection)
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Run the enclosed statements in one write transaction on the writer connection
+        
+        The transaction belongs to the task that opened it: tasks it creates run
+        outside of it (their writes wait for it to end).
+        """
+        if _current_transaction() is not None:
+            # Nested transaction: join the outer one
+            yield
+            return
+        
+        await self._ensure_connected()
+        self._queued_writes += 1
+        try:
+            await self._write_lock.acquire()
+        finally:
+            self._queued_writes -= 1
+        
+        token = _transaction_connection.set((asyncio.current_task(), self._writer))
+        try:
+            await self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                await self._writer.execute("ROLLBACK")
+                raise
+            await self._writer.execute("COMMIT")
+        finally:
+            _transaction_connection.reset(token)
+            self._write_lock.release()
+    
+    async def execute(self, query: str, values: Optional[Dict[str, Any]] = None) -> Any:
+        """Run a write statement, returns the RETURNING value or the last row id"""
+        async with self.transaction():
+            self.writes += 1
+            async with self._writer.execute(query, _bind(values)) as cursor:
+                row = await cursor.fetchone() if cursor.description else None
+                return row[0] if row is not None else cursor.lastrowid
+    
+    async def execute_many(self, query: str, values: List[Dict[str, Any]]):
+        """Run a write statement for each set of values in one transaction"""
+        async with self.transaction():
+            self.writes += 1
+            await self._writer.executemany(query, [_bind(value) for value in values])
+    
+    async def fetch_all(self, query: str, values: Optional[Dict[str, Any]] = None) -> List[sqlite3.Row]:
+        async with self._reader() as connection:
+            async with connection.execute(query, _bind(values)) as cursor:
+                return await cursor.fetchall()
+    
+    async def fetch_one(self, query: str, values: Optional[Dict[str, Any]] = None) -> Optional[sqlite3.Row]:
+        async with self._reader() as connection:
+            async with connection.execute(query, _bind(values)) as cursor:
+                return await cursor.fetchone()
+    
+    async def fetch_val(self, query: str, values: Optional[Dict[str, Any]] = None, column: int = 0) -> Any:
+        row = await self.fetch_one(query, values)
+        return row[column] if row is not None else None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Engine statistics"""
+        return {
+            "engine": "sqlite-tuned",
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "read_pool_size": self.read_pool_size,
+            "idle_readers": self._read_pool.qsize() if self._read_pool else 0,
+            "queued_writes": self._queued_writes,
+            "reads": self.reads,
+            "writes": self.writes
+        }
@@ -19,9 +19,13 @@ import uvicorn
 import os
 
 from config.settings import settings
-from api.routers import scraper_router, upload_router, export_router, health_router
+from api.routers import scraper_router, upload_router, export_router, health_router, image_router
 #from api.error_handlers import setup_exception_handlers
-from database.db_manager import create_db_and_tables
+from database.db_manager import create_db_and_tables, close_db_connection
+from scraper.parsing import parser_pool
+from services.http_client import http_client
+from services.image_pipeline import image_pipeline
+from workers.task_worker import embedded_worker
 
 # Ensure directories exist
 os.makedirs(settings.upload_folder, exist_ok=True)
@@ -61,11 +65,28 @@ app.include_router(scraper_router, prefix=settings.API_PREFIX)
 app.include_router(upload_router, prefix=settings.API_PREFIX)
 app.include_router(export_router, prefix=settings.API_PREFIX)
 app.include_router(health_router, prefix=settings.API_PREFIX)
+app.include_router(image_router, prefix=settings.API_PREFIX)
 
 @app.on_event("startup")
 async def on_startup():
     # Create database and tables
     await create_db_and_tables()
+    # Start the shared HTTP client (keep-alive connection pool)
+    await http_client.start()
+    # Start the HTML parsing processes before the first scrape
+    parser_pool.start()
+    # Consume the durable task queue in-process unless separate workers do it
+    if settings.task_queue.embedded_worker:
+        await embedded_worker.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await embedded_worker.stop()
+    # Finish pending image downloads while the HTTP session is still open
+    await image_pipeline.close()
+    await http_client.close()
+    parser_pool.close()
+    await close_db_connection()
 
 @app.get("/")
 async def root(request: Request):
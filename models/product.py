@@ -16,12 +16,23 @@ class ProductBase(BaseModel):
     price: Optional[str] = None
     box_number: Optional[str] = None
 
+class ImageRendition(BaseModel):
+    max_size: int
+    format: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    size_bytes: Optional[int] = None
+    url: Optional[str] = None
+
 class ProductImage(BaseModel):
     id: int
     product_ean: str
     image_url: Optional[str] = None
     local_path: Optional[str] = None
+    url: Optional[str] = None
+    blob_hash: Optional[str] = None
     is_primary: bool = False
+    renditions: List[ImageRendition] = []
     created_at: datetime = Field(default_factory=datetime.now)
     
     class Config:
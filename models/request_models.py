@@ -1,7 +1,9 @@
 from pydantic import BaseModel, validator
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 import re
 
+from models.product import Product
+
 class EANRequest(BaseModel):
     ean: str
     brand: Optional[str] = None
@@ -16,11 +18,37 @@ class EANRequest(BaseModel):
 class BoxDataRequest(BaseModel):
     box_data: str
 
+class ProductBatchRequest(BaseModel):
+    eans: List[str]
+    brand: Optional[str] = None
+
+class ProductLookup(BaseModel):
+    # EAN normalisé (valeur reçue si invalide)
+    ean: str
+    status: str
+    product: Optional[Product] = None
+    detail: Optional[str] = None
+
+class ProductBatchResponse(BaseModel):
+    results: List[ProductLookup]
+    # Nombre d'EANs par statut
+    counts: Dict[str, int]
+
 class TaskStatus(BaseModel):
     task_id: str
     status: str
     message: str
     results: Optional[List[Any]] = None
+    results_count: Optional[int] = None
+
+class TaskResultsPage(BaseModel):
+    task_id: str
+    status: str
+    results: List[Any]
+    # Valeur de `after` pour la page suivante (None: plus de résultat pour l'instant)
+    next_after: Optional[int] = None
+    # Tentative ayant produit les résultats: si elle change, les résultats déjà reçus sont remplacés
+    attempt: Optional[int] = None
 
 class ImageUploadRequest(BaseModel):
     ean: str
@@ -1,12 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import time
+
+from config.settings import settings
+from scraper.rate_limiter import THROTTLE_STATUSES, rate_limiter
+from services.http_client import HttpClient, http_client as default_http_client
 
 class BaseScraper(ABC):
     """Classe de base abstraite pour tous les scrapers"""
     
-    def __init__(self, site_config: Dict[str, Any]):
-        """Initialise le scraper avec la configuration du site"""
+    def __init__(self, site_config: Dict[str, Any], http_client: Optional[HttpClient] = None):
+        """Initialise le scraper avec la configuration du site et le client HTTP partagé"""
         self.site_config = site_config
+        self.http_client = http_client or default_http_client
+        # Dernier statut HTTP reçu (None tant qu'aucune réponse n'a été obtenue)
+        self.last_status: Optional[int] = None
+        # Encodage du dernier corps de réponse reçu (Content-Type ou détection)
+        self.last_encoding: Optional[str] = None
+        # Validateurs de la dernière réponse 200 (ETag, Last-Modified) pour les requêtes conditionnelles
+        self.last_etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
     
     @abstractmethod
     async def scrape_ean(self, ean: str, brand: Optional[str] = None) -> Dict[str, Any]:
@@ -16,12 +29,84 @@ class BaseScraper(ABC):
         Args:
             ean: Code EAN à scraper
             brand: Marque du produit (optionnel)
-            
+        
         Returns:
             Dict contenant les informations du produit
         """
         pass
     
+    @property
+    def site_key(self) -> str:
+        """Identifiant du site (site_name pour CELIO, domain pour Modov)"""
+        return self.site_config.get('site_name') or self.site_config.get('domain', '')
+    
+    @property
+    def answered(self) -> bool:
+        """Indique si le site a réellement répondu (200, 304 ou 404), une absence de produit est alors fiable"""
+        return self.last_status in (200, 304, 404)
+    
+    async def fetch(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes, str]:
+        """
+        Envoie une requête GET en respectant la limite de débit du site
+        
+        Les réponses 429/503 réduisent le débit du site et sont réessayées après
+        la pause demandée (Retry-After) si elle reste dans l'attente maximale.
+        Attentes de jeton et tentatives comprises, la requête reste bornée par
+        le délai d'un palier (REQUEST_TIMEOUT + TIER_TIMEOUT_MARGIN).
+        
+        Args:
+            headers: En-têtes ajoutés à ceux de la configuration (If-None-Match, etc.)
+        
+        Returns:
+            Tuple (statut HTTP, corps brut si statut 200 sinon b'', URL finale)
+            Le statut vaut 0 si la requête n'a pas pu être envoyée; l'encodage
+            du corps est disponible dans `last_encoding`, ses validateurs dans
+            `last_etag` et `last_modified`
+        """
+        session = await self.http_client.get_session()
+        bucket = rate_limiter.for_site(self.site_key, self.site_config)
+        status = 0
+        deadline = time.monotonic() + settings.scraper.tier_timeout
+        
+        for attempt in range(settings.rate_limit.max_retries + 1):
+            if not await bucket.acquire(min(settings.rate_limit.max_wait, deadline - time.monotonic())):
+                return status, b'', url
+            
+            # Aucune tentative après l'échéance, chacune est bornée par le temps restant
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return status, b'', url
+            
+            async with session.get(
+                url,
+                params=params,
+                headers={**settings.scraper.headers, **headers} if headers else settings.scraper.headers,
+                timeout=min(settings.scraper.request_timeout, remaining)
+            ) as response:
+                status = response.status
+                self.last_status = status
+                bucket.record_response(status, response.headers.get('Retry-After'))
+                
+                if status in THROTTLE_STATUSES:
+                    # Le seau impose la pause avant la tentative suivante
+                    continue
+                
+                if status != 200:
+                    return status, b'', str(response.url)
+                
+                body = await response.read()
+                self.last_encoding = response.get_encoding()
+                self.last_etag = response.headers.get('ETag')
+                self.last_modified = response.headers.get('Last-Modified')
+                return status, body, str(response.url)
+        
+        return status, b'', url
+    
     @property
     @abstractmethod
     def name(self) -> str:
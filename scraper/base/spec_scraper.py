@@ -0,0 +1,102 @@
+from typing import Dict, Any, Optional
+import logging
+
+from scraper.base.base_scraper import BaseScraper
+from scraper.extraction import extract, get_spec
+from scraper.parsing import parser_pool
+from scraper.response_cache import CachedResponse, response_cache
+from services.http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+class SpecScraper(BaseScraper):
+    """
+    Scraper générique piloté par une spec d'extraction (settings.EXTRACTION_SPECS)
+    
+    L'URL de recherche, le nom de la source, les valeurs imposées et les champs
+    extraits viennent de la spec: ajouter un site ne demande que de la configuration.
+    """
+    
+    # Spec utilisée par défaut, la clé "spec" de la configuration du site est prioritaire
+    spec_name: Optional[str] = None
+    
+    def __init__(self, site_config: Dict[str, Any], http_client: Optional[HttpClient] = None):
+        super().__init__(site_config, http_client=http_client)
+        # ValueError dès la création si la spec est inconnue ou invalide
+        self.spec = get_spec(site_config.get('spec') or self.spec_name)
+    
+    @property
+    def name(self) -> str:
+        return self.spec.source_name(self.site_config)
+    
+    def new_result(self, ean: str, brand: Optional[str] = None) -> Dict[str, Any]:
+        """Résultat vide d'un EAN, avec les valeurs imposées par la spec"""
+        result = {
+            'ean': ean,
+            'brand': brand or '',
+            'category': '',
+            'name': '',
+            'description': '',
+            'color': '',
+            'size': '',
+            'long_description': '',
+            'source': self.name,
+            'source_url': '',
+            'image_url': '',
+            'price': ''
+        }
+        result.update(self.spec.default_values(self.site_config))
+        return result
+    
+    async def scrape_ean(self, ean: str, brand: Optional[str] = None) -> Dict[str, Any]:
+        """Scrape les informations d'un produit à partir d'un EAN selon la spec du site"""
+        logger.info(f"Recherche {self.name} pour EAN: {ean} sur {self.site_key}")
+        
+        result = self.new_result(ean, brand)
+        
+        try:
+            # Générer l'URL depuis le gabarit
+            url = self.spec.build_url(self.site_config, ean)
+            result['source_url'] = url
+            
+            # Requête conditionnelle si la page est déjà dans le cache
+            cached = await response_cache.get(self.site_key, ean)
+            status, body, final_url = await self.fetch(url, headers=cached.validators if cached else None)
+            
+            if status == 304 and cached is not None:
+                logger.info(f"Page inchangée pour EAN {ean} sur {self.site_key}, lecture du cache")
+                body, encoding, final_url = cached.body, cached.encoding, cached.url
+            elif status == 200:
+                encoding = self.last_encoding
+                await response_cache.put(self.site_key, ean, CachedResponse(
+                    url=final_url,
+                    body=body,
+                    encoding=encoding,
+                    etag=self.last_etag,
+                    last_modified=self.last_modified
+                ))
+            else:
+                logger.warning(f"Statut de réponse non 200: {status}")
+                return result
+            
+            return await self.extract_result(result, body, encoding, final_url)
+        
+        except Exception as e:
+            logger.error(f"Erreur lors du scraping {self.name} pour EAN {ean}: {str(e)}")
+            return result
+    
+    async def extract_result(self, result: Dict[str, Any], body: bytes, encoding: Optional[str], final_url: str) -> Dict[str, Any]:
+        """Complète un résultat avec les champs extraits d'une page (hors de la boucle asyncio)"""
+        data = await parser_pool.run(extract, self.spec.name, body, encoding, self.site_config)
+        if not data:
+            logger.info(f"Aucun produit trouvé pour EAN {result['ean']} sur {self.site_key}")
+            return result
+        
+        result.update(data)
+        
+        # URL de la source
+        result['source_url'] = final_url
+        
+        logger.info(f"Produit trouvé pour EAN {result['ean']}: {result['name']}")
+        
+        return result
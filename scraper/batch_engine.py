@@ -0,0 +1,154 @@
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+import asyncio
+import logging
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class SiteLimiter:
+    """Limite le nombre de requêtes simultanées vers un même site"""
+    
+    def __init__(self, per_site_concurrency: int):
+        self.per_site_concurrency = max(1, per_site_concurrency)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    def for_site(self, site_key: str) -> asyncio.Semaphore:
+        """Retourne le sémaphore associé à un site (créé à la demande)"""
+        semaphore = self._semaphores.get(site_key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_site_concurrency)
+            self._semaphores[site_key] = semaphore
+        return semaphore
+
+class BatchEngine:
+    """Exécute un traitement sur un lot d'éléments via un pool borné de workers"""
+    
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = max(1, concurrency or settings.batch.concurrency)
+    
+    async def run(
+        self,
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        handler: Callable[[Any], Awaitable[Any]],
+        label: str = "lot",
+        describe: Optional[Callable[[Any], str]] = None
+    ) -> List[Any]:
+        """
+        Traite les éléments avec au plus `concurrency` traitements simultanés
+        
+        Args:
+            items: Éléments à traiter, éventuellement produits au fil de l'eau
+                (itérable asynchrone: le traitement commence dès le premier élément)
+            handler: Coroutine appelée pour chaque élément
+            label: Libellé utilisé dans les logs
+            describe: Fonction décrivant un élément dans les logs d'erreur (optionnel)
+        
+        Returns:
+            Résultats des éléments traités avec succès, dans l'ordre d'entrée
+        """
+        results = {index: result async for index, result in self.stream(items, handler, label, describe)}
+        return [results[index] for index in sorted(results)]
+    
+    async def stream(
+        self,
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        handler: Callable[[Any], Awaitable[Any]],
+        label: str = "lot",
+        describe: Optional[Callable[[Any], str]] = None
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Comme run, mais produit chaque résultat (index d'entrée, résultat) dès qu'il est prêt
+        
+        Les résultats sortent dans l'ordre de fin de traitement. Un consommateur lent
+        freine les workers (file de sortie bornée); s'il s'arrête, les traitements
+        en cours sont annulés.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        done: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        # Fin des traitements, signalée sans attente même si `done` est plein
+        finished = asyncio.Event()
+        succeeded = 0
+        failed = 0
+        started_at = time.monotonic()
+        
+        async def producer():
+            if isinstance(items, AsyncIterable):
+                index = 0
+                async for item in items:
+                    await queue.put((index, item))
+                    index += 1
+            else:
+                for index, item in enumerate(items):
+                    await queue.put((index, item))
+            for _ in range(self.concurrency):
+                await queue.put(None)
+        
+        async def worker():
+            nonlocal failed
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    return
+                index, item = entry
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    # Une erreur sur un élément n'interrompt pas le lot
+                    failed += 1
+                    description = describe(item) if describe else f"l'élément {index}"
+                    logger.error(f"Erreur lors du traitement de {description}: {str(e)}")
+                    continue
+                await done.put((index, result))
+        
+        async def run_all():
+            try:
+                await asyncio.gather(producer(), *workers)
+            finally:
+                finished.set()
+        
+        async def next_entry() -> Optional[Tuple[int, Any]]:
+            """Prochain résultat, None une fois tous les éléments traités"""
+            while done.empty():
+                if finished.is_set():
+                    return None
+                getter = asyncio.ensure_future(done.get())
+                waiter = asyncio.ensure_future(finished.wait())
+                try:
+                    await asyncio.wait({getter, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiter.cancel()
+                    if not getter.done():
+                        # Un élément déjà attribué reste dans la file
+                        getter.cancel()
+                if getter.done():
+                    return getter.result()
+            return done.get_nowait()
+        
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        runner = asyncio.create_task(run_all())
+        try:
+            while True:
+                entry = await next_entry()
+                if entry is None:
+                    break
+                succeeded += 1
+                yield entry
+            # Propage une erreur de lecture des éléments
+            await runner
+        finally:
+            for task in [runner, *workers]:
+                task.cancel()
+            
+            duration = time.monotonic() - started_at
+            total = succeeded + failed
+            throughput = total / duration if duration > 0 else 0.0
+            logger.info(
+                f"{label.capitalize()} terminé: {total} EANs en {duration:.1f}s "
+                f"({throughput:.2f} EANs/s, {failed} en erreur, concurrence={self.concurrency})"
+            )
+
+# Instances partagées
+site_limiter = SiteLimiter(settings.batch.site_concurrency)
+batch_engine = BatchEngine()
@@ -0,0 +1,171 @@
+"""
+Moteur d'extraction déclaratif
+
+Chaque site est décrit par une spec (settings.EXTRACTION_SPECS) plutôt que par du
+code: sélecteurs CSS essayés dans l'ordre, attributs de repli, expression
+régulière de post-traitement, URL absolue, gabarit d'URL de recherche. Les specs
+sont compilées une fois par processus (y compris dans le pool d'analyse) puis
+exécutées par le même moteur, quel que soit le moteur HTML (voir scraper.parsing).
+
+Format d'une spec:
+    {
+        "url_template": "https://{domain}/search?q={ean}",  # clés de la config du site + ean
+        "source": "Modov ({domain})",                       # nom de la source
+        "defaults": {"brand": "CELIO"},                     # valeurs imposées au résultat
+        "scope": "article",                                 # élément racine, aucun résultat s'il manque
+        "fields": {
+            "name": {"selectors": ["h1"]},
+            "image_url": {
+                "selectors": ["img"],                       # le premier sélecteur qui trouve un élément l'emporte
+                "attrs": ["src", "data-src"],               # texte de l'élément si absent
+                "regex": r"(\d+)",                          # premier groupe (ou correspondance entière)
+                "absolute": "https://{site_name}"           # base des URL relatives
+            }
+        }
+    }
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Pattern, Tuple
+from urllib.parse import quote, urljoin
+
+from config.settings import settings
+from scraper.parsing import parse_document
+
+SPEC_KEYS = {"url_template", "source", "defaults", "scope", "fields"}
+FIELD_KEYS = {"selectors", "attrs", "regex", "absolute"}
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Règle d'extraction d'un champ"""
+    name: str
+    selectors: Tuple[str, ...]
+    attrs: Tuple[str, ...] = ()
+    regex: Optional[Pattern] = None
+    absolute: Optional[str] = None
+    
+    def extract(self, node, context: Dict[str, Any]) -> str:
+        element = None
+        for selector in self.selectors:
+            element = node.select_one(selector)
+            if element is not None:
+                break
+        if element is None:
+            return ""
+        
+        if self.attrs:
+            value = next((element.attr(attr) for attr in self.attrs if element.attr(attr)), "")
+        else:
+            value = element.text()
+        
+        if value and self.regex is not None:
+            match = self.regex.search(value)
+            value = (match.group(1) if self.regex.groups else match.group(0)) if match else ""
+        
+        if value and self.absolute and not value.startswith("http"):
+            value = urljoin(self.absolute.format(**context), value)
+        
+        return value.strip() if value else ""
+
+@dataclass(frozen=True)
+class ExtractionSpec:
+    """Spec compilée d'un site"""
+    name: str
+    url_template: str
+    source: str
+    defaults: Tuple[Tuple[str, str], ...]
+    scope: Optional[str]
+    fields: Tuple[FieldSpec, ...]
+    
+    def build_url(self, site_config: Dict[str, Any], ean: str) -> str:
+        """URL de recherche d'un EAN (le gabarit de la config du site est prioritaire)"""
+        template = site_config.get("url_template") or self.url_template
+        return template.format(**{**site_config, "ean": quote(ean, safe="")})
+    
+    def source_name(self, site_config: Dict[str, Any]) -> str:
+        return self.source.format(**site_config)
+    
+    def default_values(self, site_config: Dict[str, Any]) -> Dict[str, str]:
+        return {key: value.format(**site_config) for key, value in self.defaults}
+    
+    def extract(self, document, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Extrait les champs trouvés ({} si l'élément racine est absent)"""
+        root = document
+        if self.scope:
+            root = document.select_one(self.scope)
+            if root is None:
+                return {}
+        
+        data = {}
+        for field in self.fields:
+            value = field.extract(root, context)
+            if value:
+                data[field.name] = value
+        return data
+
+def compile_spec(name: str, raw: Dict[str, Any]) -> ExtractionSpec:
+    """Valide et compile une spec (ValueError si elle est invalide)"""
+    unknown = set(raw) - SPEC_KEYS
+    if unknown:
+        raise ValueError(f"Spec {name}: clés inconnues {sorted(unknown)}")
+    if not raw.get("url_template"):
+        raise ValueError(f"Spec {name}: url_template manquant")
+    
+    fields = []
+    for field_name, field in raw.get("fields", {}).items():
+        unknown = set(field) - FIELD_KEYS
+        if unknown:
+            raise ValueError(f"Spec {name}, champ {field_name}: clés inconnues {sorted(unknown)}")
+        
+        selectors = field.get("selectors")
+        if isinstance(selectors, str):
+            selectors = [selectors]
+        if not selectors:
+            raise ValueError(f"Spec {name}, champ {field_name}: aucun sélecteur")
+        
+        attrs = field.get("attrs") or ()
+        if isinstance(attrs, str):
+            attrs = [attrs]
+        
+        try:
+            regex = re.compile(field["regex"]) if field.get("regex") else None
+        except re.error as e:
+            raise ValueError(f"Spec {name}, champ {field_name}: expression régulière invalide ({e})")
+        
+        fields.append(FieldSpec(
+            name=field_name,
+            selectors=tuple(selectors),
+            attrs=tuple(attrs),
+            regex=regex,
+            absolute=field.get("absolute")
+        ))
+    
+    return ExtractionSpec(
+        name=name,
+        url_template=raw["url_template"],
+        source=raw.get("source", name),
+        defaults=tuple(raw.get("defaults", {}).items()),
+        scope=raw.get("scope"),
+        fields=tuple(fields)
+    )
+
+# Specs compilées du processus courant
+_compiled_specs: Dict[str, ExtractionSpec] = {}
+
+def get_spec(name: str) -> ExtractionSpec:
+    """Spec compilée d'un nom, toutes les specs étant compilées au premier appel"""
+    if not _compiled_specs:
+        for spec_name, raw in settings.scraper.extraction_specs.items():
+            _compiled_specs[spec_name] = compile_spec(spec_name, raw)
+    
+    if name not in _compiled_specs:
+        raise ValueError(f"Spec d'extraction inconnue: {name}")
+    return _compiled_specs[name]
+
+def extract(spec_name: str, body: bytes, encoding: Optional[str], context: Dict[str, Any], backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extrait les champs d'une page brute selon une spec
+    
+    Fonction sans état, exécutable dans le pool d'analyse (ParserPool).
+    """
+    return get_spec(spec_name).extract(parse_document(body, encoding, backend), context)
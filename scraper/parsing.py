@@ -0,0 +1,151 @@
+"""
+Extraction HTML des pages produit, exécutée hors de la boucle asyncio
+
+Les fonctions d'extraction (voir scraper.extraction) prennent le corps brut de la
+réponse (bytes) et retournent un dict des champs trouvés. Elles n'ont aucun état
+et peuvent donc tourner dans un pool de processus (ParserPool). Le moteur d'analyse est choisi
+au démarrage selon ce qui est installé: selectolax (lexbor), puis lxml (via
+BeautifulSoup), puis html.parser de la bibliothèque standard.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+def available_backends() -> List[str]:
+    """Moteurs d'analyse utilisables, du plus rapide au plus lent"""
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    if HAS_LXML:
+        backends.append("lxml")
+    backends.append("html.parser")
+    return backends
+
+def resolve_backend(requested: str = "auto") -> str:
+    """Moteur à utiliser pour PARSER_BACKEND (auto = le plus rapide installé)"""
+    backends = available_backends()
+    if requested in backends:
+        return requested
+    if requested != "auto":
+        logger.warning(f"Moteur HTML {requested} indisponible, utilisation de {backends[0]}")
+    return backends[0]
+
+class _SoupNode:
+    """Noeud BeautifulSoup (lxml ou html.parser)"""
+    
+    def __init__(self, tag):
+        self.tag = tag
+    
+    def select_one(self, selector: str) -> Optional["_SoupNode"]:
+        tag = self.tag.select_one(selector)
+        return _SoupNode(tag) if tag is not None else None
+    
+    def select(self, selector: str) -> List["_SoupNode"]:
+        return [_SoupNode(tag) for tag in self.tag.select(selector)]
+    
+    def text(self) -> str:
+        return self.tag.get_text(strip=True)
+    
+    def attr(self, name: str) -> Optional[str]:
+        value = self.tag.get(name)
+        # BeautifulSoup découpe les attributs multi-valués (class)
+        return " ".join(value) if isinstance(value, list) else value
+
+class _LexborNode:
+    """Noeud selectolax (lexbor)"""
+    
+    def __init__(self, node):
+        self.node = node
+    
+    def select_one(self, selector: str) -> Optional["_LexborNode"]:
+        node = self.node.css_first(selector)
+        return _LexborNode(node) if node is not None else None
+    
+    def select(self, selector: str) -> List["_LexborNode"]:
+        return [_LexborNode(node) for node in self.node.css(selector)]
+    
+    def text(self) -> str:
+        return self.node.text(deep=True, separator="", strip=True)
+    
+    def attr(self, name: str) -> Optional[str]:
+        return self.node.attributes.get(name)
+
+def parse_document(body: bytes, encoding: Optional[str] = None, backend: Optional[str] = None):
+    """Analyse un document HTML brut avec le moteur demandé (par défaut PARSER_BACKEND)"""
+    backend = backend or resolve_backend(settings.parser.backend)
+    encoding = encoding or "utf-8"
+    
+    if backend == "selectolax":
+        return _LexborNode(LexborHTMLParser(body.decode(encoding, errors="replace")).root)
+    
+    from bs4 import BeautifulSoup
+    return _SoupNode(BeautifulSoup(body, backend, from_encoding=encoding))
+
+class ParserPool:
+    """
+    Pool de processus pour l'analyse HTML
+    
+    L'analyse est liée au CPU: exécutée dans la boucle asyncio, elle bloque toutes
+    les autres coroutines, y compris les requêtes de l'API. Le pool l'exécute dans
+    PARSER_PROCESSES processus (0 = analyse directe dans la boucle).
+    """
+    
+    def __init__(self, processes: Optional[int] = None):
+        self.processes = settings.parser.processes if processes is None else processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+    
+    def start(self) -> Optional[ProcessPoolExecutor]:
+        """Crée le pool de processus si nécessaire"""
+        if self.enabled and self._executor is None:
+            # spawn: ne pas dupliquer l'état du processus parent (boucle, connexions, threads)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Pool d'analyse HTML démarré ({self.processes} processus, moteur {resolve_backend(settings.parser.backend)})")
+        return self._executor
+    
+    async def run(self, extractor: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+        """Exécute une fonction d'extraction dans le pool"""
+        executor = self.start()
+        if executor is None:
+            return extractor(*args)
+        
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, extractor, *args)
+        except BrokenProcessPool:
+            # Un processus a été tué (mémoire, signal): recréer le pool pour les appels suivants
+            logger.error("Pool d'analyse HTML interrompu, redémarrage")
+            self.close()
+            return extractor(*args)
+    
+    def close(self):
+        """Arrête les processus du pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Singleton instance
+parser_pool = ParserPool()
@@ -1,4 +1,4 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, AsyncIterable, AsyncIterator, Iterable, Optional, Union
 import logging
 import asyncio
 import aiohttp
@@ -6,30 +6,90 @@ from datetime import datetime
 
 from config.settings import settings
 from database.repositories.product_repository import product_repository
+from database.repositories.negative_cache_repository import negative_cache_repository
+from database.bulk_writer import BulkWriter
 from scraper.base.scraper_factory import scraper_factory
+from scraper.batch_engine import batch_engine, site_limiter
 from services.image_service import image_service
+from utils.ean_normalizer import EanNormalizer, normalize_eans
 from utils.excel_parser import ExcelParser
+from utils.single_flight import SingleFlight
 from utils.text_parser import TextParser
 
 logger = logging.getLogger(__name__)
 
+# Statuts d'un EAN d'une recherche groupée (lookup_batch)
+LOOKUP_CACHED = "cached"
+LOOKUP_SCRAPED = "scraped"
+LOOKUP_NOT_FOUND = "not_found"
+LOOKUP_INVALID = "invalid"
+LOOKUP_ERROR = "error"
+
 class ScraperProcessor:
     """Processeur principal de scraping"""
     
     def __init__(self):
         self.excel_parser = ExcelParser()
         self.text_parser = TextParser()
+        # Un seul traitement en cours par EAN dans le processus
+        self.inflight = SingleFlight()
+    
+    async def process_ean(
+        self,
+        ean: str,
+        brand: Optional[str] = None,
+        box_number: Optional[str] = None,
+        writer: Optional[BulkWriter] = None
+    ) -> Dict[str, Any]:
+        """
+        Traite un EAN en le scrapant depuis les différentes sources
+        
+        Avec un BulkWriter, la ligne produit est mise en tampon et le résultat
+        scrapé est retourné tel quel (sans id) au lieu d'être relu en base.
+        L'image est téléchargée en tâche de fond: le produit est retourné avant
+        qu'elle soit traitée.
+        Les appels simultanés pour un même EAN (requêtes API, tâches, lots) partagent
+        un seul traitement et son résultat: la marque et la box du premier appel
+        sont retenues, comme pour un EAN déjà en base. Un appel qui rejoint un lot
+        en cours écrit lui-même la ligne partagée (son BulkWriter ou un upsert):
+        elle ne dépend pas du tampon du lot, qui peut être déjà fermé.
+        """
+        joined = self.inflight.in_flight(ean)
+        if joined:
+            logger.info(f"EAN {ean} déjà en cours de traitement, attente du résultat")
+        
+        result = await self.inflight.do(ean, lambda: self._process_ean(ean, brand, box_number, writer))
+        
+        if joined and result is not None and 'id' not in result:
+            # Ligne encore dans le tampon du BulkWriter du lot rejoint (upsert, la même ligne peut être réécrite)
+            if writer is not None:
+                await writer.add_product(result)
+            else:
+                await product_repository.upsert_many([result])
+                result = await product_repository.get_by_ean(ean)
+        
+        return result
     
-    async def process_ean(self, ean: str, brand: Optional[str] = None, box_number: Optional[str] = None) -> Dict[str, Any]:
-        """Traite un EAN en le scrapant depuis les différentes sources"""
+    async def _process_ean(
+        self,
+        ean: str,
+        brand: Optional[str],
+        box_number: Optional[str],
+        writer: Optional[BulkWriter]
+    ) -> Dict[str, Any]:
         logger.info(f"Traitement de l'EAN: {ean}")
         
-        # Vérifier si l'EAN existe déjà en base
+        # Vérifier si l'EAN existe déjà en base (une ligne sans nom n'est pas un résultat)
         existing_product = await product_repository.get_by_ean(ean)
-        if existing_product:
+        if existing_product and existing_product.get('name'):
             logger.info(f"EAN {ean} trouvé en cache")
             return existing_product
         
+        # EAN introuvable récemment: aucune requête HTTP avant expiration du cache négatif
+        if existing_product and await negative_cache_repository.is_active(ean):
+            logger.info(f"EAN {ean} trouvé en cache négatif")
+            return existing_product
+        
         # Initialiser le résultat avec les infos de base
         result = {
             'ean': ean,
@@ -37,86 +97,299 @@ class ScraperProcessor:
             'box_number': box_number or '',
         }
         
+        # Sites ayant répondu sans produit
+        missed_sites = []
+        
         # Essayer CELIO d'abord
-        celio_found = False
-        for site_config in settings.scraper.celio_sites:
-            celio_scraper = scraper_factory.get_scraper("celio", site_config)
-            celio_result = await celio_scraper.scrape_ean(ean, brand)
-            
-            if celio_result and celio_result.get('name'):
-                result.update(celio_result)
-                celio_found = True
-                break
+        celio_result = await self.scrape_tier("celio", settings.scraper.celio_sites, ean, brand, misses=missed_sites)
         
-        # Si pas trouvé sur CELIO, essayer Modov
-        if not celio_found:
+        if celio_result:
+            result.update(celio_result)
+        else:
+            # Si pas trouvé sur CELIO, essayer Modov
             logger.info(f"EAN {ean} non trouvé sur CELIO, essai avec Modov...")
             
-            for domain_info in settings.scraper.modov_domains:
-                modov_scraper = scraper_factory.get_scraper("modov", domain_info)
-                modov_result = await modov_scraper.scrape_ean(ean, brand)
-                
-                if modov_result and modov_result.get('name'):
-                    result.update(modov_result)
-                    break
+            modov_result = await self.scrape_tier("modov", settings.scraper.modov_domains, ean, brand, misses=missed_sites)
+            if modov_result:
+                result.update(modov_result)
         
-        # Sauvegarder en base de données
-        product_id = await product_repository.create(result)
+        if result.get('name'):
+            await negative_cache_repository.clear(ean)
+        else:
+            await self._record_miss(ean, missed_sites)
         
-        # Télécharger l'image si disponible
-        if result.get('image_url'):
-            await image_service.download_product_image(result)
+        # Sauvegarder en base de données (la ligne d'un EAN introuvable sert de réservation);
+        # upsert: un autre processus (worker) peut avoir inséré l'EAN entre-temps
+        if writer is not None:
+            await writer.add_product(result)
+        else:
+            await product_repository.upsert_many([result])
         
-        # Récupérer le produit complet avec ses images
+        # Télécharger l'image si disponible, sans l'attendre (pipeline d'images),
+        # une fois la ligne produit écrite pour que la ligne d'image puisse la référencer
+        if writer is not None:
+            writer.after_flush(lambda: image_service.schedule_download(result))
+        else:
+            image_service.schedule_download(result)
+        
+        if writer is not None:
+            return result
+        
+        # Récupérer le produit complet (ses images arrivent en tâche de fond)
         complete_product = await product_repository.get_by_ean(ean)
         
         return complete_product
     
-    async def process_excel_file(self, file_path: str) -> List[Dict[str, Any]]:
-        """Traite un fichier Excel contenant des EANs"""
-        logger.info(f"Traitement du fichier Excel: {file_path}")
+    async def _record_miss(self, ean: str, missed_sites: List[str]):
+        """Enregistre un EAN introuvable dans le cache négatif"""
+        total_sites = len(settings.scraper.celio_sites) + len(settings.scraper.modov_domains)
         
-        # Parser le fichier Excel
-        excel_data = self.excel_parser.parse_excel_data(file_path)
+        # Si des sites n'ont pas répondu, l'absence n'est pas certaine: TTL réduit
+        if len(set(missed_sites)) >= total_sites:
+            ttl = settings.negative_cache.ttl
+        else:
+            ttl = settings.negative_cache.partial_ttl
         
-        results = []
-        for item in excel_data:
+        logger.info(f"EAN {ean} introuvable ({len(missed_sites)}/{total_sites} sites), cache négatif pour {ttl}")
+        await negative_cache_repository.record_miss(ean, missed_sites, ttl)
+    
+    async def scrape_tier(
+        self,
+        site_type: str,
+        site_configs: List[Dict[str, Any]],
+        ean: str,
+        brand: Optional[str] = None,
+        misses: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Interroge un palier de sites et retourne le meilleur résultat selon l'ordre de priorité
+        
+        Args:
+            misses: Liste complétée avec les sites ayant répondu sans produit (optionnel)
+        """
+        misses = misses if misses is not None else []
+        # L'ordre de la configuration fait foi, la clé 'priority' (Modov) le précise
+        ordered_configs = sorted(site_configs, key=lambda config: config.get('priority', 0))
+        scrapers = [scraper_factory.get_scraper(site_type, config) for config in ordered_configs]
+        
+        if settings.scraper.scrape_mode == "sequential":
+            for scraper in scrapers:
+                site_result = await self._scrape_site(scraper, ean, brand)
+                if site_result and site_result.get('name'):
+                    return site_result
+                if site_result is not None:
+                    misses.append(scraper.site_key)
+            return None
+        
+        return await self._scrape_tier_concurrent(scrapers, ean, brand, misses)
+    
+    async def _scrape_site(self, scraper: Any, ean: str, brand: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Scrape un site en respectant la concurrence maximale par site"""
+        async with site_limiter.for_site(scraper.site_key):
+            # Le délai ne court qu'une fois la place obtenue, l'attente ne compte pas comme un échec
             try:
-                result = await self.process_ean(
+                site_result = await asyncio.wait_for(scraper.scrape_ean(ean, brand), timeout=settings.scraper.tier_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Délai dépassé pour EAN {ean} sur {scraper.site_key}")
+                return None
+        
+        # None signale un site qui n'a pas répondu: il n'est pas compté dans le cache négatif
+        if site_result and site_result.get('name'):
+            return site_result
+        return site_result if scraper.answered else None
+    
+    async def _scrape_tier_concurrent(self, scrapers: List[Any], ean: str, brand: Optional[str], misses: List[str]) -> Optional[Dict[str, Any]]:
+        """Lance tous les scrapers du palier en parallèle et annule les requêtes devenues inutiles"""
+        # Le palier entier est borné, attente d'une place par site comprise
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.scraper.tier_timeout
+        
+        # Tâche -> rang de priorité (0 = plus prioritaire)
+        pending = {
+            asyncio.create_task(self._scrape_site(scraper, ean, brand)): rank
+            for rank, scraper in enumerate(scrapers)
+        }
+        hits = {}
+        
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning(f"Délai du palier dépassé pour EAN {ean}, {len(pending)} requête(s) annulée(s)")
+                    break
+                
+                done, _ = await asyncio.wait(pending.keys(), timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    rank = pending.pop(task)
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    site_result = task.result()
+                    if site_result and site_result.get('name'):
+                        hits[rank] = site_result
+                    elif site_result is not None:
+                        misses.append(scrapers[rank].site_key)
+                
+                if hits:
+                    best_rank = min(hits)
+                    # Les sites moins prioritaires que le meilleur résultat ne servent plus à rien
+                    for task, rank in list(pending.items()):
+                        if rank > best_rank:
+                            task.cancel()
+                            pending.pop(task)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if not hits:
+            return None
+        
+        best_result = hits[min(hits)]
+        logger.info(f"Meilleur résultat pour EAN {ean}: {best_result.get('source')}")
+        return best_result
+    
+    async def process_batch(
+        self,
+        items: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        label: str = "lot"
+    ) -> List[Dict[str, Any]]:
+        """Traite des EANs ({'ean', 'brand', 'box_number'}), liste ou flux, via le pool de workers borné"""
+        async with BulkWriter() as writer:
+            async def handle(item: Dict[str, Any]) -> Dict[str, Any]:
+                return await self.process_ean(
                     ean=item['ean'],
                     brand=item.get('brand', ''),
-                    box_number=item.get('box_number', '')
+                    box_number=item.get('box_number', ''),
+                    writer=writer
                 )
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Erreur lors du traitement de l'EAN {item['ean']}: {str(e)}")
+            
+            results = await batch_engine.run(items, handle, label=label, describe=lambda item: f"l'EAN {item['ean']}")
         
-        return results
+        # Toutes les lignes sont écrites: relire les produits complets en une requête groupée
+        products = await product_repository.get_many_by_ean([result['ean'] for result in results])
+        missing = [result['ean'] for result in results if result['ean'] not in products]
+        if missing:
+            logger.error(f"{len(missing)} EAN(s) absent(s) de la base après écriture ({label}): {', '.join(missing)}")
+        return [products[result['ean']] for result in results if result['ean'] in products]
     
-    async def process_box_data(self, box_data_text: str) -> List[Dict[str, Any]]:
-        """Traite des données de box contenant des EANs"""
-        logger.info("Traitement des données de box")
+    async def lookup_batch(self, eans: List[str], brand: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Résout un lot d'EANs: les produits déjà en base sont lus en une requête
+        groupée, seuls les autres sont scrapés, en parallèle (process_batch)
         
-        # Parser les données de box
-        boxes = self.text_parser.parse_multiple_boxes_data(box_data_text)
+        Returns:
+            Une entrée par EAN demandé, dans l'ordre: {ean, status, product, detail}
+            avec status cached, scraped, not_found, invalid ou error
+        """
+        canonical_eans, reasons = normalize_eans(eans)
+        valid_eans = list(dict.fromkeys(ean for ean in canonical_eans if ean))
+        
+        products = await product_repository.get_many_by_ean(valid_eans)
+        statuses = {ean: LOOKUP_CACHED for ean in valid_eans if products.get(ean, {}).get('name')}
+        
+        to_scrape = [ean for ean in valid_eans if ean not in statuses]
+        if to_scrape:
+            scraped = await self.process_batch(
+                [{'ean': ean, 'brand': brand or ''} for ean in to_scrape],
+                label="recherche groupée"
+            )
+            for product in scraped:
+                products[product['ean']] = product
+                statuses[product['ean']] = LOOKUP_SCRAPED if product.get('name') else LOOKUP_NOT_FOUND
+        
+        lookups = []
+        for value, ean, reason in zip(eans, canonical_eans, reasons):
+            if reason is not None:
+                lookups.append({'ean': value, 'status': LOOKUP_INVALID, 'product': None, 'detail': reason})
+            elif ean not in statuses:
+                # Erreur de traitement, déjà journalisée par le moteur de lots
+                lookups.append({'ean': ean, 'status': LOOKUP_ERROR, 'product': None, 'detail': "Erreur de traitement"})
+            else:
+                status = statuses[ean]
+                lookups.append({
+                    'ean': ean,
+                    'status': status,
+                    'product': products[ean] if status != LOOKUP_NOT_FOUND else None,
+                    'detail': None
+                })
         
-        results = []
-        for box in boxes:
-            brand = box['brand']
-            box_number = box['box_number']
+        return lookups
+    
+    async def stream_batch(
+        self,
+        items: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        label: str = "lot"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Comme process_batch, mais produit chaque résultat dès que son EAN est traité
+        
+        Les nouveaux produits sont émis tels que scrapés: leurs lignes sont écrites
+        par lots (BulkWriter) et n'ont pas encore d'id au moment de l'émission.
+        """
+        async with BulkWriter() as writer:
+            async def handle(item: Dict[str, Any]) -> Dict[str, Any]:
+                return await self.process_ean(
+                    ean=item['ean'],
+                    brand=item.get('brand', ''),
+                    box_number=item.get('box_number', ''),
+                    writer=writer
+                )
             
-            for ean in box['ean_codes']:
-                try:
-                    result = await self.process_ean(
-                        ean=ean,
-                        brand=brand,
-                        box_number=box_number
-                    )
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"Erreur lors du traitement de l'EAN {ean}: {str(e)}")
-        
-        return results
+            async for _, result in batch_engine.stream(items, handle, label=label, describe=lambda item: f"l'EAN {item['ean']}"):
+                yield result
+    
+    async def process_excel_file(self, file_path: str, normalizer: Optional[EanNormalizer] = None) -> List[Dict[str, Any]]:
+        """
+        Traite un fichier Excel ou CSV contenant des EANs
+        
+        Args:
+            normalizer: Étape de normalisation (optionnelle), porte le bilan des EANs rejetés
+        """
+        logger.info(f"Traitement du fichier Excel: {file_path}")
+        
+        # Lecture au fil de l'eau: le scraping commence avant la fin de la lecture du fichier
+        records = self.excel_parser.stream_records(file_path, normalizer)
+        
+        return await self.process_batch(records, label="fichier Excel")
+    
+    def stream_excel_file(self, file_path: str, normalizer: Optional[EanNormalizer] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Traite un fichier Excel ou CSV en produisant chaque résultat dès qu'il est prêt"""
+        logger.info(f"Traitement du fichier Excel: {file_path}")
+        return self.stream_batch(self.excel_parser.stream_records(file_path, normalizer), label="fichier Excel")
+    
+    def box_items(self, box_data_text: str, normalizer: EanNormalizer) -> List[Dict[str, Any]]:
+        """EANs valides et uniques de données de box"""
+        boxes = self.text_parser.parse_multiple_boxes_data(box_data_text)
+        
+        items = [
+            {'ean': ean, 'brand': box['brand'], 'box_number': box['box_number']}
+            for box in boxes
+            for ean in box['ean_codes']
+        ]
+        
+        # EANs invalides et doublons écartés avant tout scraping
+        items = normalizer.normalize(items)
+        logger.info(f"Données de box: {normalizer.summary()}")
+        return items
+    
+    async def process_box_data(self, box_data_text: str, normalizer: Optional[EanNormalizer] = None) -> List[Dict[str, Any]]:
+        """
+        Traite des données de box contenant des EANs
+        
+        Args:
+            normalizer: Étape de normalisation (optionnelle), porte le bilan des EANs rejetés
+        """
+        logger.info("Traitement des données de box")
+        items = self.box_items(box_data_text, normalizer if normalizer is not None else EanNormalizer())
+        return await self.process_batch(items, label="lot de box")
+    
+    def stream_box_data(self, box_data_text: str, normalizer: Optional[EanNormalizer] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Traite des données de box en produisant chaque résultat dès qu'il est prêt"""
+        logger.info("Traitement des données de box")
+        items = self.box_items(box_data_text, normalizer if normalizer is not None else EanNormalizer())
+        return self.stream_batch(items, label="lot de box")
 
 # Singleton instance
 scraper_processor = ScraperProcessor()
\ No newline at end of file
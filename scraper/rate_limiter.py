@@ -0,0 +1,162 @@
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuts HTTP signalant un throttling du site
+THROTTLE_STATUSES = (429, 503)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en délai en secondes"""
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class TokenBucket:
+    """Seau à jetons d'un site avec réduction adaptative du débit (AIMD)"""
+    
+    def __init__(self, site_key: str, max_rate: float, burst: int):
+        self.site_key = site_key
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self._lock = asyncio.Lock()
+        
+        # Statistiques
+        self.requests = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+    
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+    
+    async def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Attend un jeton avant d'envoyer une requête
+        
+        Args:
+            max_wait: Attente maximale en secondes (défaut: RATE_LIMIT_MAX_WAIT)
+        
+        Returns:
+            False si le site reste bloqué ou saturé au-delà de l'attente maximale
+        """
+        max_wait = settings.rate_limit.max_wait if max_wait is None else max_wait
+        
+        async with self._lock:
+            started_at = time.monotonic()
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    self.waited_seconds += now - started_at
+                    return True
+                else:
+                    delay = (1 - self.tokens) / self.rate
+                
+                if now + delay - started_at > max_wait:
+                    self.rejected += 1
+                    logger.warning(f"Site {self.site_key} saturé, requête abandonnée (attente {delay:.1f}s)")
+                    return False
+                
+                await asyncio.sleep(delay)
+    
+    def record_response(self, status: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Ajuste le débit selon la réponse du site
+        
+        Returns:
+            Délai de blocage appliqué en cas de throttling, None sinon
+        """
+        if status not in THROTTLE_STATUSES:
+            # Augmentation additive jusqu'au débit configuré
+            self.consecutive_throttles = 0
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + settings.rate_limit.increase_step)
+            return None
+        
+        # Réduction multiplicative et pause (Retry-After ou backoff exponentiel)
+        self.throttled += 1
+        self.consecutive_throttles += 1
+        self.rate = max(settings.rate_limit.min_rate, self.rate * settings.rate_limit.backoff_factor)
+        
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = settings.rate_limit.base_backoff * (2 ** (self.consecutive_throttles - 1))
+        delay = min(delay, settings.rate_limit.max_backoff)
+        
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.tokens = 0.0
+        logger.warning(
+            f"Throttling {status} sur {self.site_key}: pause de {delay:.1f}s, "
+            f"débit réduit à {self.rate:.2f} req/s"
+        )
+        return delay
+    
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du seau"""
+        return {
+            "site": self.site_key,
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "burst": self.capacity,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 3)
+        }
+
+class RateLimiter:
+    """Registre des seaux à jetons par site (site_name ou domain)"""
+    
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+    
+    def for_site(self, site_key: str, site_config: Optional[Dict[str, Any]] = None) -> TokenBucket:
+        """Retourne le seau d'un site, créé à partir de sa configuration"""
+        bucket = self._buckets.get(site_key)
+        if bucket is None:
+            site_config = site_config or {}
+            bucket = TokenBucket(
+                site_key,
+                max_rate=float(site_config.get('max_rps', settings.rate_limit.default_rps)),
+                burst=int(site_config.get('burst', settings.rate_limit.burst))
+            )
+            self._buckets[site_key] = bucket
+        return bucket
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Statistiques de tous les sites"""
+        return {site_key: bucket.stats() for site_key, bucket in self._buckets.items()}
+
+# Singleton instance
+rate_limiter = RateLimiter()
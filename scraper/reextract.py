@@ -0,0 +1,93 @@
+"""
+Réextraction hors ligne des produits: python -m scraper.reextract [--ean EAN ...] [--dry-run]
+
+Applique les specs d'extraction actuelles aux pages du cache des réponses, sans
+aucune requête HTTP, dans l'ordre du scraping (sites CELIO, puis Modov par
+priorité): la première page qui donne un nom de produit reconstruit la ligne.
+Utile après un changement de balisage d'un site ou la correction d'un sélecteur.
+Les images ne sont pas retéléchargées.
+"""
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from database.db_manager import create_db_and_tables, close_db_connection
+from database.repositories.negative_cache_repository import negative_cache_repository
+from database.repositories.product_repository import product_repository
+from scraper.base.scraper_factory import scraper_factory
+from scraper.parsing import parser_pool
+from scraper.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+def _scrapers() -> List[Any]:
+    """Scrapers de tous les paliers, dans l'ordre du scraping"""
+    scrapers = []
+    for site_type, site_configs in (("celio", settings.scraper.celio_sites), ("modov", settings.scraper.modov_domains)):
+        for config in sorted(site_configs, key=lambda config: config.get('priority', 0)):
+            scrapers.append(scraper_factory.get_scraper(site_type, config))
+    return scrapers
+
+async def reextract_ean(ean: str, scrapers: List[Any], dry_run: bool = False) -> Optional[Dict[str, Any]]:
+    """Reconstruit la ligne produit d'un EAN depuis ses pages conservées (None si aucune ne convient)"""
+    existing_product = await product_repository.get_by_ean(ean)
+    brand = existing_product.get('brand') if existing_product else None
+    
+    for scraper in scrapers:
+        cached = await response_cache.get(scraper.site_key, ean)
+        if cached is None:
+            continue
+        
+        result = scraper.new_result(ean, brand)
+        result['source_url'] = cached.url
+        result = await scraper.extract_result(result, cached.body, cached.encoding, cached.url)
+        if not result.get('name'):
+            continue
+        
+        if not dry_run:
+            if existing_product:
+                await product_repository.update(ean, result)
+            else:
+                await product_repository.create(result)
+            await negative_cache_repository.clear(ean)
+        return result
+    
+    return None
+
+async def reextract(eans: Optional[List[str]] = None, dry_run: bool = False) -> Dict[str, int]:
+    """Réextrait les EANs donnés (par défaut tous ceux du cache)"""
+    eans = eans or response_cache.eans()
+    scrapers = _scrapers()
+    semaphore = asyncio.Semaphore(max(1, parser_pool.processes) * 2)
+    
+    async def handle(ean: str) -> bool:
+        async with semaphore:
+            return await reextract_ean(ean, scrapers, dry_run) is not None
+    
+    found = sum(await asyncio.gather(*(handle(ean) for ean in eans)))
+    logger.info(f"Réextraction terminée: {found}/{len(eans)} produits reconstruits{' (simulation)' if dry_run else ''}")
+    return {"total": len(eans), "found": found}
+
+async def run(eans: Optional[List[str]], dry_run: bool):
+    await create_db_and_tables()
+    try:
+        await reextract(eans, dry_run)
+    finally:
+        parser_pool.close()
+        await close_db_connection()
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m scraper.reextract", description="Réextraction des produits depuis le cache des réponses")
+    parser.add_argument("--ean", action="append", dest="eans",
+                        help="EAN à réextraire (répétable, par défaut tous les EANs du cache)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Extraire sans modifier la base")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run(args.eans, args.dry_run))
+
+if __name__ == "__main__":
+    main()
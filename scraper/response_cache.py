@@ -0,0 +1,180 @@
+"""
+Cache disque des réponses HTTP brutes, par (site, EAN)
+
+Chaque page reçue est conservée compressée avec ses validateurs (ETag,
+Last-Modified). La requête suivante du même EAN sur le même site est
+conditionnelle: un 304 réutilise la page du cache sans la retransférer. Les
+pages conservées permettent aussi de réextraire les produits hors ligne après
+une correction de spec (python -m scraper.reextract).
+
+Format d'un fichier: une ligne de métadonnées JSON puis le corps compressé (zlib).
+La taille totale est bornée (RESPONSE_CACHE_MAX_MB): au-delà, les pages les moins
+récemment utilisées sont supprimées.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".page"
+# Après une éviction, la taille totale redescend à cette fraction du maximum
+EVICTION_TARGET = 0.9
+
+def _safe_name(value: str) -> str:
+    """Nom de fichier sûr pour un site ou un EAN"""
+    return re.sub(r"[^\w.-]", "_", value)
+
+@dataclass
+class CachedResponse:
+    """Réponse HTTP conservée dans le cache"""
+    url: str
+    body: bytes = field(repr=False)
+    encoding: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    
+    @property
+    def validators(self) -> Dict[str, str]:
+        """En-têtes d'une requête conditionnelle"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """Cache disque des réponses, partagé entre processus (un fichier par page)"""
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        compression_level: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.root = Path(path or settings.response_cache.path)
+        self.max_bytes = settings.response_cache.max_bytes if max_bytes is None else max_bytes
+        self.compression_level = settings.response_cache.compression_level if compression_level is None else compression_level
+        self.enabled = settings.response_cache.enabled if enabled is None else enabled
+        # Taille totale estimée (None tant que le répertoire n'a pas été parcouru)
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _path(self, site: str, ean: str) -> Path:
+        return self.root / _safe_name(site) / f"{_safe_name(ean)}{SUFFIX}"
+    
+    async def get(self, site: str, ean: str) -> Optional[CachedResponse]:
+        """Page conservée pour un site et un EAN (None si absente)"""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._read, self._path(site, ean))
+    
+    async def put(self, site: str, ean: str, response: CachedResponse):
+        """Conserve une page (compression et écriture hors de la boucle asyncio)"""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._write, self._path(site, ean), response)
+        except OSError as e:
+            logger.warning(f"Impossible de conserver la page {site}/{ean}: {str(e)}")
+    
+    def eans(self) -> List[str]:
+        """EANs ayant au moins une page conservée"""
+        if not self.root.is_dir():
+            return []
+        return sorted({
+            entry.name[:-len(SUFFIX)]
+            for site_dir in self.root.iterdir() if site_dir.is_dir()
+            for entry in os.scandir(site_dir) if entry.name.endswith(SUFFIX)
+        })
+    
+    def _read(self, path: Path) -> Optional[CachedResponse]:
+        try:
+            with open(path, "rb") as f:
+                metadata = json.loads(f.readline())
+                body = zlib.decompress(f.read())
+            # Date d'accès pour l'éviction des pages les moins récemment utilisées
+            os.utime(path)
+            return CachedResponse(body=body, **metadata)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, zlib.error) as e:
+            logger.warning(f"Page du cache illisible {path}, suppression: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+    
+    def _write(self, path: Path, response: CachedResponse):
+        metadata = asdict(response)
+        del metadata["body"]
+        data = json.dumps(metadata).encode() + b"\n" + zlib.compress(response.body, self.compression_level)
+        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous_size = path.stat().st_size if path.exists() else 0
+        # Écriture atomique: un lecteur ne voit jamais une page incomplète
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += len(data) - previous_size
+            
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+    
+    def _scan(self):
+        """Pages conservées: (chemin, taille, date d'accès)"""
+        if not self.root.is_dir():
+            return
+        for site_dir in os.scandir(self.root):
+            if not site_dir.is_dir():
+                continue
+            for entry in os.scandir(site_dir.path):
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime
+    
+    def _evict(self):
+        """Supprime les pages les moins récemment utilisées jusqu'à EVICTION_TARGET du maximum"""
+        # Nouveau parcours: les autres processus écrivent aussi dans le cache
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICTION_TARGET
+        evicted = 0
+        
+        for entry_path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        
+        self._total_bytes = total
+        if evicted:
+            logger.info(f"Cache des réponses: {evicted} pages supprimées ({total // 1024} Ko conservés)")
+
+# Singleton instance
+response_cache = ResponseCache()
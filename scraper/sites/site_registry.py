@@ -1,11 +1,13 @@
 from typing import Dict, Type, Any
 import importlib
 import logging
+from config.settings import settings
 from scraper.base.base_scraper import BaseScraper
+from scraper.base.spec_scraper import SpecScraper
 
 logger = logging.getLogger(__name__)
 
-# Registre des scrapers disponibles
+# Registre des scrapers disponibles (les types absents utilisent SpecScraper avec leur spec d'extraction)
 SCRAPER_REGISTRY = {
     "celio": "scraper.sites.celio_scraper.CelioScraper",
     "modov": "scraper.sites.modov_scraper.ModovScraper"
@@ -22,6 +24,9 @@ def get_scraper_class(site_type: str) -> Type[BaseScraper]:
         Classe de scraper
     """
     if site_type not in SCRAPER_REGISTRY:
+        if site_type in settings.scraper.extraction_specs:
+            # Site décrit uniquement par sa spec d'extraction
+            return type(f"{site_type.title()}SpecScraper", (SpecScraper,), {"spec_name": site_type})
         raise ValueError(f"Type de scraper non supporté: {site_type}")
     
     try:
@@ -41,4 +46,4 @@ def get_all_sites():
     Returns:
         Liste des types de sites supportés
     """
-    return list(SCRAPER_REGISTRY.keys())
\ No newline at end of file
+    return list(dict.fromkeys([*SCRAPER_REGISTRY, *settings.scraper.extraction_specs]))
\ No newline at end of file
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class HttpClient:
+    """Client HTTP partagé avec un pool de connexions keep-alive"""
+    
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+    
+    @property
+    def is_started(self) -> bool:
+        return self._session is not None and not self._session.closed
+    
+    async def start(self) -> aiohttp.ClientSession:
+        """Crée la session partagée et son connecteur si nécessaire"""
+        async with self._lock:
+            if self.is_started:
+                return self._session
+            
+            connector = aiohttp.TCPConnector(
+                limit=settings.http.pool_limit,
+                limit_per_host=settings.http.pool_limit_per_host,
+                ttl_dns_cache=settings.http.dns_cache_ttl,
+                keepalive_timeout=settings.http.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=settings.headers,
+                timeout=aiohttp.ClientTimeout(total=settings.request_timeout)
+            )
+            logger.info(
+                f"Session HTTP démarrée (limite={settings.http.pool_limit}, "
+                f"par hôte={settings.http.pool_limit_per_host})"
+            )
+            return self._session
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Retourne la session partagée, démarrée à la demande hors du cycle de vie FastAPI"""
+        if self.is_started:
+            return self._session
+        return await self.start()
+    
+    async def close(self):
+        """Ferme la session et libère les connexions du pool"""
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+                logger.info("Session HTTP fermée")
+            self._session = None
+
+# Singleton instance
+http_client = HttpClient()
@@ -0,0 +1,247 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import aiofiles
+import aiofiles.os
+from PIL import Image
+
+from config.settings import settings
+from services.http_client import HttpClient, http_client as default_http_client
+
+logger = logging.getLogger(__name__)
+
+class ImageTooLarge(Exception):
+    """Image source au-delà de IMAGE_DOWNLOAD_MAX_MB"""
+
+# Formats des déclinaisons: format Pillow et extension de fichier
+RENDITION_FORMATS = {"jpeg": ("JPEG", "jpg"), "webp": ("WEBP", "webp"), "avif": ("AVIF", "avif")}
+
+try:
+    # Encodeur AVIF (optionnel, absent de Pillow < 11)
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+def available_formats(requested: List[str]) -> List[str]:
+    """Formats de déclinaison demandés que Pillow sait encoder"""
+    # Chargement des encodeurs de Pillow (Image.SAVE est rempli à la demande)
+    Image.init()
+    formats = []
+    for name in requested:
+        if name not in RENDITION_FORMATS:
+            logger.warning(f"Format d'image inconnu ignoré: {name}")
+        elif RENDITION_FORMATS[name][0] not in Image.SAVE:
+            logger.warning(f"Format d'image non pris en charge par Pillow, ignoré: {name}")
+        else:
+            formats.append(name)
+    return formats
+
+def _encode(img: Image.Image, format: str, jpeg_quality: int, webp_quality: int) -> bytes:
+    output = io.BytesIO()
+    if format == "jpeg":
+        img.save(output, "JPEG", optimize=True, quality=jpeg_quality)
+    elif format == "webp":
+        img.save(output, "WEBP", quality=webp_quality, method=4)
+    else:
+        img.save(output, RENDITION_FORMATS[format][0], quality=webp_quality)
+    return output.getvalue()
+
+def render_image(
+    content: bytes,
+    max_dimension: int,
+    sizes: List[int],
+    formats: List[str],
+    jpeg_quality: int,
+    webp_quality: int
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Décode une image et produit l'image de référence (JPEG, au plus max_dimension)
+    et ses déclinaisons (chaque taille de `sizes` dans chaque format)
+    
+    Exécuté dans le pool de threads (Pillow libère le GIL pendant le décodage,
+    le redimensionnement et l'encodage). L'image n'est décodée qu'une fois et
+    chaque taille est calculée depuis la précédente, de la plus grande à la
+    plus petite. Pas d'agrandissement: les tailles supérieures à l'image sont
+    remplacées par l'image elle-même.
+    
+    Returns:
+        Tuple (référence, déclinaisons), chacune {max_size, format, width, height, data}
+        (data vaut None pour la déclinaison JPEG identique à la référence)
+    """
+    with Image.open(io.BytesIO(content)) as source:
+        # Décodage JPEG directement à une échelle réduite (1/2, 1/4, 1/8) quand c'est possible
+        source.draft("RGB", (max_dimension, max_dimension))
+        img = source.convert("RGB")
+    if img.width > max_dimension or img.height > max_dimension:
+        img.thumbnail((max_dimension, max_dimension))
+    
+    longest = max(img.width, img.height)
+    reference = {
+        "max_size": longest,
+        "format": "jpeg",
+        "width": img.width,
+        "height": img.height,
+        "data": _encode(img, "jpeg", jpeg_quality, webp_quality)
+    }
+    
+    renditions = []
+    current = img
+    for max_size in sorted({min(size, longest) for size in sizes}, reverse=True):
+        if max_size < max(current.width, current.height):
+            current = current.copy()
+            current.thumbnail((max_size, max_size))
+        for format in formats:
+            identical = max_size == longest and format == "jpeg"
+            renditions.append({
+                "max_size": max_size,
+                "format": format,
+                "width": current.width,
+                "height": current.height,
+                "data": None if identical else _encode(current, format, jpeg_quality, webp_quality)
+            })
+    
+    return reference, renditions
+
+class ImagePipeline:
+    """
+    Traitement des images hors de la boucle asyncio
+    
+    - téléchargements limités à IMAGE_DOWNLOAD_CONCURRENCY simultanés et IMAGE_DOWNLOAD_MAX_MB
+    - décodage, redimensionnement et encodage (image de référence et déclinaisons)
+      dans IMAGE_PROCESSING_THREADS threads
+    - écriture des fichiers avec aiofiles
+    - tâches de fond (submit) pour que le scraping n'attende pas ses images,
+      au plus IMAGE_QUEUE_SIZE en attente (au-delà, l'image est ignorée)
+    """
+    
+    def __init__(self, http_client: Optional[HttpClient] = None):
+        self.http_client = http_client or default_http_client
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._download_semaphore: Optional[asyncio.Semaphore] = None
+        self._jobs: Set[asyncio.Task] = set()
+        self._pending_keys: Set[Hashable] = set()
+        self.formats = available_formats(settings.image.rendition_formats)
+        
+        # Statistiques
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+    
+    def start(self) -> ThreadPoolExecutor:
+        """Crée le pool de threads si nécessaire"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.image.processing_threads),
+                thread_name_prefix="image"
+            )
+        return self._executor
+    
+    async def download(self, url: str) -> Optional[bytes]:
+        """Télécharge une image (None si le serveur ne la renvoie pas)"""
+        if self._download_semaphore is None:
+            self._download_semaphore = asyncio.Semaphore(max(1, settings.image.download_concurrency))
+        
+        max_bytes = settings.image.download_max_bytes
+        async with self._download_semaphore:
+            session = await self.http_client.get_session()
+            async with session.get(url, headers=settings.headers, timeout=settings.request_timeout) as response:
+                if response.status != 200:
+                    return None
+                if (response.content_length or 0) > max_bytes:
+                    raise ImageTooLarge(f"{url}: {response.content_length} octets")
+                
+                chunks = []
+                size = 0
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ImageTooLarge(f"{url}: plus de {max_bytes} octets")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+    
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Exécute une fonction liée au CPU dans le pool de threads"""
+        return await asyncio.get_running_loop().run_in_executor(self.start(), func, *args)
+    
+    async def render(self, content: bytes) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Image de référence et déclinaisons (voir render_image), calculées dans le pool de threads"""
+        return await self.run(
+            render_image,
+            content,
+            settings.image.max_dimension,
+            settings.image.rendition_sizes,
+            self.formats,
+            settings.image.jpeg_quality,
+            settings.image.webp_quality
+        )
+    
+    async def write(self, path: str, data: bytes):
+        """Écrit un fichier sans bloquer la boucle (fichier temporaire puis renommage)"""
+        tmp_path = f"{path}.tmp"
+        async with aiofiles.open(tmp_path, "wb") as f:
+            await f.write(data)
+        await aiofiles.os.replace(tmp_path, path)
+    
+    def submit(self, key: Hashable, job: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Lance job() en tâche de fond
+        
+        Une seule tâche par clé à la fois. Retourne False si la tâche est ignorée
+        (déjà en attente ou file pleine).
+        """
+        if key in self._pending_keys:
+            return False
+        if len(self._jobs) >= settings.image.queue_size:
+            self.dropped += 1
+            logger.warning(f"File d'images pleine ({len(self._jobs)}), image ignorée: {key}")
+            return False
+        
+        self._pending_keys.add(key)
+        task = asyncio.ensure_future(self._run(key, job))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+        return True
+    
+    async def _run(self, key: Hashable, job: Callable[[], Awaitable[Any]]):
+        try:
+            await job()
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Erreur du pipeline d'images pour {key}: {str(e)}")
+        finally:
+            self._pending_keys.discard(key)
+    
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin des tâches en cours (False si le délai est dépassé)"""
+        if not self._jobs:
+            return True
+        _, pending = await asyncio.wait(set(self._jobs), timeout=timeout)
+        return not pending
+    
+    async def close(self):
+        """Termine les tâches en cours (dans la limite de IMAGE_SHUTDOWN_TIMEOUT) et arrête le pool"""
+        if not await self.drain(settings.image.shutdown_timeout):
+            logger.warning(f"Arrêt du pipeline d'images: {len(self._jobs)} images abandonnées")
+            for task in list(self._jobs):
+                task.cancel()
+            await asyncio.gather(*self._jobs, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        # Le sémaphore est lié à la boucle courante
+        self._download_semaphore = None
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
+
+# Singleton instance
+image_pipeline = ImagePipeline()
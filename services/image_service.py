@@ -1,28 +1,54 @@
 import os
-import aiohttp
 import logging
-import shutil
-from typing import Dict, Any, Optional
-from datetime import datetime
-from pathlib import Path
+from typing import Dict, Any, List, Optional
 from fastapi import UploadFile, HTTPException
-from PIL import Image
-import io
 
 from config.settings import settings
+from database.repositories.image_repository import image_repository
 from database.repositories.product_repository import product_repository
+from services.image_pipeline import ImagePipeline, image_pipeline as default_image_pipeline
+from services.image_store import ImageStore, image_store as default_image_store
 
 logger = logging.getLogger(__name__)
 
 class ImageService:
     """Service de gestion des images produit"""
     
+    def __init__(self, pipeline: Optional[ImagePipeline] = None, store: Optional[ImageStore] = None):
+        self.pipeline = pipeline or default_image_pipeline
+        self.store = store or default_image_store
+    
+    def schedule_download(self, product_data: Dict[str, Any]) -> bool:
+        """
+        Télécharge l'image d'un produit en tâche de fond
+        
+        Le produit est retourné sans attendre son image, qui apparaît dans ses
+        images une fois traitée.
+        """
+        if not product_data.get('image_url'):
+            return False
+        
+        # Copie: le résultat retourné à l'appelant peut être modifié entre-temps
+        product_data = dict(product_data)
+        return self.pipeline.submit(
+            (product_data.get('ean'), product_data['image_url']),
+            lambda: self.download_product_image(product_data)
+        )
+    
     async def download_product_image(self, product_data: Dict[str, Any]) -> Optional[str]:
-        """Télécharge l'image d'un produit depuis une URL"""
+        """
+        Télécharge l'image d'un produit depuis une URL
+        
+        L'image est partagée avec les autres produits de même image (ImageStore):
+        elle n'est téléchargée et encodée que si elle est nouvelle.
+        
+        Args:
+            product_data: Données du produit (ean, image_url, color, size)
+        """
         image_url = product_data.get('image_url')
         if not image_url:
             return None
-            
+        
         ean = product_data.get('ean')
         
         # Vérifier le nombre d'images déjà présentes
@@ -32,53 +58,31 @@ class ImageService:
             return None
         
         try:
-            # Générer le nom de fichier
-            color = product_data.get('color', 'none').replace(' ', '_')
-            size = product_data.get('size', 'none').replace(' ', '_')
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = f"{ean}-{size}-{color}-{timestamp}.jpg"
-            filepath = os.path.join(settings.image.storage_path, filename)
-            
-            # Télécharger l'image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    image_url, 
-                    headers=settings.headers,
-                    timeout=settings.request_timeout
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    image_content = await response.read()
-                    
-                    # Optimiser l'image si possible
-                    try:
-                        with Image.open(io.BytesIO(image_content)) as img:
-                            # Redimensionner si trop grande
-                            if img.width > 1200 or img.height > 1200:
-                                img.thumbnail((1200, 1200))
-                            
-                            # Sauvegarder en JPEG
-                            img = img.convert("RGB")
-                            img.save(filepath, "JPEG", optimize=True, quality=85)
-                    except Exception as e:
-                        # Si l'optimisation échoue, sauvegarder l'original
-                        logger.error(f"Erreur d'optimisation d'image: {str(e)}")
-                        with open(filepath, 'wb') as f:
-                            f.write(image_content)
-            
-            # Sauvegarder en base de données
-            is_primary = image_count == 0  # La première image est l'image principale
-            image_id = await product_repository.add_product_image({
-                "product_ean": ean,
-                "image_url": image_url,
-                "local_path": filepath,
-                "is_primary": is_primary
-            })
+            blob = await self.store.store_url(image_url)
             
-            logger.info(f"Image téléchargée: {filename}")
-            return filepath
+            # Image protégée d'une suppression concurrente jusqu'à l'ajout de la référence
+            async with self.store.hold(blob, lambda: self.store.store_url(image_url)) as blob:
+                if blob is None:
+                    return None
+                
+                # Même image déjà associée au produit (autre URL ou nouveau scraping)
+                if await product_repository.has_blob_image(ean, blob["hash"]):
+                    return blob["local_path"]
+                
+                # Sauvegarder en base de données
+                is_primary = image_count == 0  # La première image est l'image principale
+                image_data = {
+                    "product_ean": ean,
+                    "image_url": image_url,
+                    "local_path": blob["local_path"],
+                    "blob_hash": blob["hash"],
+                    "is_primary": is_primary
+                }
+                await product_repository.add_product_image(image_data)
             
+            logger.info(f"Image enregistrée pour l'EAN {ean}: {blob['local_path']}")
+            return blob["local_path"]
+        
         except Exception as e:
             logger.error(f"Erreur de téléchargement d'image pour {ean}: {str(e)}")
             return None
@@ -106,14 +110,6 @@ class ImageService:
                 detail=f"Extension de fichier non autorisée. Extensions autorisées: {', '.join(settings.image.allowed_extensions)}"
             )
         
-        # Générer le nom de fichier
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        color = product.get("color", "none").replace(' ', '_')
-        size = product.get("size", "none").replace(' ', '_')
-        
-        filename = f"{ean}-{size}-{color}-{timestamp}-upload{ext}"
-        filepath = os.path.join(settings.image.storage_path, filename)
-        
         # Lire le contenu du fichier
         file_content = await file.read()
         
@@ -124,43 +120,55 @@ class ImageService:
                 detail=f"Fichier trop volumineux. Taille maximale: {settings.image.max_file_size_mb}MB"
             )
         
-        # Sauvegarder et optimiser l'image
+        # Optimiser l'image (dans le pool de threads) et la stocker, sauf si elle l'est déjà
         try:
-            with open(filepath, 'wb') as f:
-                f.write(file_content)
-            
-            # Optimiser l'image
-            with Image.open(filepath) as img:
-                # Redimensionner si trop grande
-                if img.width > 1200 or img.height > 1200:
-                    img.thumbnail((1200, 1200))
-                
-                # Sauvegarder en JPEG
-                img = img.convert("RGB")
-                img.save(filepath, "JPEG", optimize=True, quality=85)
+            blob = await self.store.store_bytes(file_content)
         except Exception as e:
             logger.error(f"Erreur de traitement d'image: {str(e)}")
-            if os.path.exists(filepath):
-                os.remove(filepath)
             raise HTTPException(status_code=500, detail="Erreur de traitement d'image")
         
-        # Sauvegarder en base de données
+        # Sauvegarder en base de données (image protégée d'une suppression concurrente)
         is_primary = image_count == 0  # La première image est l'image principale
-        image_id = await product_repository.add_product_image({
-            "product_ean": ean,
-            "local_path": filepath,
-            "is_primary": is_primary
-        })
+        async with self.store.hold(blob, lambda: self.store.store_bytes(file_content)) as blob:
+            image_id = await product_repository.add_product_image({
+                "product_ean": ean,
+                "local_path": blob["local_path"],
+                "blob_hash": blob["hash"],
+                "is_primary": is_primary
+            })
         
-        logger.info(f"Image uploadée: {filename}")
+        logger.info(f"Image uploadée pour l'EAN {ean}: {blob['local_path']}")
         
         return {
             "id": image_id,
             "product_ean": ean,
-            "local_path": filepath,
+            "local_path": blob["local_path"],
             "is_primary": is_primary
         }
     
+    async def get_rendition(self, ean: str, image_id: int, width: int, format: str = "webp") -> Dict[str, Any]:
+        """
+        Plus petite déclinaison d'une image dont la largeur atteint `width`
+        
+        À défaut la plus grande du format, puis l'image de référence (images
+        antérieures aux déclinaisons).
+        """
+        image = await product_repository.get_product_image(image_id)
+        if not image or image.get('product_ean') != ean:
+            raise HTTPException(status_code=404, detail="Image non trouvée")
+        
+        renditions: List[Dict[str, Any]] = []
+        if image.get('blob_hash'):
+            renditions = [
+                rendition for rendition in await image_repository.get_renditions(image['blob_hash'])
+                if rendition['format'] == format
+            ]
+        if not renditions:
+            return image
+        
+        # Déclinaisons triées de la plus petite à la plus grande
+        return next((rendition for rendition in renditions if rendition['width'] >= width), renditions[-1])
+    
     async def set_primary_image(self, ean: str, image_id: int) -> bool:
         """Définit une image comme image principale"""
         # Mettre à jour en base de données
@@ -174,16 +182,21 @@ class ImageService:
         if not image or image.get('product_ean') != ean:
             raise HTTPException(status_code=404, detail="Image non trouvée")
         
-        # Supprimer le fichier
-        filepath = image.get('local_path')
-        if filepath and os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-            except Exception as e:
-                logger.error(f"Erreur de suppression du fichier {filepath}: {str(e)}")
-        
         # Supprimer de la base de données
         success = await product_repository.delete_product_image(image_id)
+        if not success:
+            return False
+        
+        # Supprimer le fichier: image partagée seulement si plus aucun produit ne la référence
+        if image.get('blob_hash'):
+            await self.store.release(image['blob_hash'])
+        else:
+            filepath = image.get('local_path')
+            if filepath and os.path.exists(filepath):
+                try:
+                    os.remove(filepath)
+                except Exception as e:
+                    logger.error(f"Erreur de suppression du fichier {filepath}: {str(e)}")
         
         return success
 
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import aiofiles.os
+
+from config.settings import settings
+from database.repositories.image_repository import ImageRepository, image_repository as default_image_repository
+from services.image_pipeline import RENDITION_FORMATS, ImagePipeline, image_pipeline as default_image_pipeline
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class ImageStore:
+    """
+    Stockage des images adressé par contenu
+    
+    Chaque image distincte est encodée et enregistrée une seule fois sous
+    blobs/<2 premiers caractères>/<sha256 de l'image source>.jpg, avec ses
+    déclinaisons (<sha256>-<taille>.<format>), et partagée par toutes les lignes
+    product_images qui la référencent (blob_hash). Deux niveaux de déduplication:
+    - l'URL source (hash de l'URL): une image déjà téléchargée ne l'est plus
+    - le contenu (hash des octets téléchargés): une même image servie sous
+      plusieurs URLs n'est encodée et stockée qu'une fois
+    Une image n'est supprimée (release) que sans aucune référence, vérifié par
+    la même requête que la suppression; dans le processus, un verrou par image
+    empêche la suppression entre le stockage et l'ajout d'une référence (hold).
+    """
+    
+    def __init__(self, pipeline: Optional[ImagePipeline] = None, repository: Optional[ImageRepository] = None):
+        self.pipeline = pipeline or default_image_pipeline
+        self.repository = repository or default_image_repository
+        # Un seul téléchargement par URL et un seul encodage par contenu dans le processus
+        self.inflight = SingleFlight()
+        # Verrou par image (hash du contenu), libéré quand plus personne ne l'attend
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        # Statistiques
+        self.url_hits = 0
+        self.content_hits = 0
+        self.stored = 0
+    
+    @property
+    def root(self) -> str:
+        return os.path.join(settings.image.storage_path, "blobs")
+    
+    def blob_path(self, blob_hash: str, max_size: Optional[int] = None, format: str = "jpeg") -> str:
+        """Chemin de l'image de référence, ou d'une déclinaison si max_size est donné"""
+        suffix = f"-{max_size}" if max_size is not None else ""
+        return os.path.join(self.root, blob_hash[:2], f"{blob_hash}{suffix}.{RENDITION_FORMATS[format][1]}")
+    
+    async def store_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Image stockée d'une URL, téléchargée si elle est inconnue (None si indisponible)"""
+        url_hash = sha256_hex(url.encode("utf-8"))
+        return await self.inflight.do(("url", url_hash), lambda: self._store_url(url, url_hash))
+    
+    async def _store_url(self, url: str, url_hash: str) -> Optional[Dict[str, Any]]:
+        blob = await self.repository.get_blob_by_source(url_hash)
+        if blob and await aiofiles.os.path.exists(blob["local_path"]):
+            self.url_hits += 1
+            return blob
+        
+        content = await self.pipeline.download(url)
+        if content is None:
+            return None
+        
+        blob = await self.store_bytes(content)
+        await self.repository.add_source(url_hash, url, blob["hash"])
+        return blob
+    
+    async def store_bytes(self, content: bytes) -> Dict[str, Any]:
+        """
+        Image stockée d'un contenu source, encodée et enregistrée si elle est nouvelle
+        
+        Lève l'exception de Pillow si le contenu n'est pas une image.
+        """
+        blob_hash = await self.pipeline.run(sha256_hex, content)
+        return await self.inflight.do(("blob", blob_hash), lambda: self._store_blob(blob_hash, content))
+    
+    async def _store_blob(self, blob_hash: str, content: bytes) -> Dict[str, Any]:
+        blob = await self.repository.get_blob(blob_hash)
+        if blob and await aiofiles.os.path.exists(blob["local_path"]):
+            self.content_hits += 1
+            return blob
+        
+        reference, renditions = await self.pipeline.render(content)
+        path = self.blob_path(blob_hash)
+        await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+        await self.pipeline.write(path, reference["data"])
+        
+        for rendition in renditions:
+            if rendition["data"] is None:
+                # Même image que la référence: fichier partagé
+                rendition["local_path"] = path
+                rendition["size_bytes"] = len(reference["data"])
+            else:
+                rendition["local_path"] = self.blob_path(blob_hash, rendition["max_size"], rendition["format"])
+                rendition["size_bytes"] = len(rendition["data"])
+                await self.pipeline.write(rendition["local_path"], rendition["data"])
+        
+        blob = {
+            "hash": blob_hash,
+            "local_path": path,
+            "width": reference["width"],
+            "height": reference["height"],
+            "size_bytes": len(reference["data"])
+        }
+        # Déclinaisons d'abord: une image visible en base a toutes les siennes
+        await self.repository.add_renditions(blob_hash, renditions)
+        await self.repository.add_blob(blob)
+        self.stored += 1
+        return blob
+    
+    def _lock(self, blob_hash: str) -> asyncio.Lock:
+        lock = self._locks.get(blob_hash)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[blob_hash] = lock
+        return lock
+    
+    @asynccontextmanager
+    async def hold(
+        self,
+        blob: Optional[Dict[str, Any]],
+        restore: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Protège une image stockée de la suppression le temps d'y ajouter une référence
+        
+        Une image supprimée (release) entre son stockage et la prise du verrou est
+        stockée de nouveau par `restore` (store_url ou store_bytes).
+        """
+        while blob is not None:
+            async with self._lock(blob["hash"]):
+                if await self.repository.get_blob(blob["hash"]) is not None:
+                    yield blob
+                    return
+            logger.info(f"Image {blob['hash']} supprimée entre-temps, nouveau stockage")
+            blob = await restore()
+        yield None
+    
+    async def release(self, blob_hash: str) -> bool:
+        """Supprime une image stockée qui n'est plus référencée par aucun produit"""
+        async with self._lock(blob_hash):
+            blob = await self.repository.get_blob(blob_hash)
+            renditions = await self.repository.get_renditions(blob_hash)
+            if not await self.repository.delete_blob(blob_hash):
+                return False
+            
+            paths = {rendition["local_path"] for rendition in renditions}
+            if blob:
+                paths.add(blob["local_path"])
+            for path in paths:
+                try:
+                    await aiofiles.os.remove(path)
+                except FileNotFoundError:
+                    pass
+            return True
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "url_hits": self.url_hits,
+            "content_hits": self.content_hits,
+            "stored": self.stored
+        }
+
+# Singleton instance
+image_store = ImageStore()
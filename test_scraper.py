@@ -2,6 +2,7 @@ import asyncio
 import logging
 from scraper.processor import scraper_processor
 from database.db_manager import database, create_db_and_tables
+from services.http_client import http_client
 
 # Configure logging
 logging.basicConfig(
@@ -43,6 +44,8 @@ async def test_scraper():
     except Exception as e:
         logger.error(f"Error during test: {str(e)}", exc_info=True)
         raise
+    finally:
+        await http_client.close()
 
 if __name__ == "__main__":
     asyncio.run(test_scraper()) 
\ No newline at end of file
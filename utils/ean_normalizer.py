@@ -0,0 +1,125 @@
+"""
+Normalisation des EANs d'un lot (Excel, CSV, box), vectorisée avec pandas et NumPy
+
+Chaque valeur est réduite à ses chiffres ASCII (les chiffres Unicode d'autres
+écritures sont écartés comme tout autre caractère) puis ramenée à sa forme canonique:
+- EAN-8 (8 chiffres): conservé tel quel
+- UPC-A (12 chiffres): préfixé d'un 0, soit l'EAN-13 équivalent
+- EAN-13
+- GTIN-14: ramené à l'EAN-13 quand l'indicateur vaut 0, conservé sinon
+La clé de contrôle GS1 est vérifiée et les doublons du lot sont écartés avant
+tout scraping. Les rejets sont comptés par motif (EanNormalizer.report).
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+REJECT_EMPTY = "vide"
+REJECT_LENGTH = "longueur invalide"
+REJECT_CHECKSUM = "clé de contrôle invalide"
+REJECT_DUPLICATE = "doublon"
+
+VALID_LENGTHS = (8, 12, 13, 14)
+# Exemples de valeurs rejetées conservés dans le rapport
+MAX_REJECTED_SAMPLES = 20
+
+# Pondération GS1 des 13 premiers chiffres d'un GTIN-14 (les zéros de tête ne comptent pas)
+_WEIGHTS = np.array([3, 1] * 6 + [3], dtype=np.int64)
+
+def _cell_text(value: Any) -> str:
+    """Valeur brute en texte (None et NaN vides, entiers stockés en float par Excel)"""
+    if value is None or value != value:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+def normalize_eans(values: Sequence[Any]) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+    """
+    Normalise et valide un lot de valeurs brutes
+    
+    Returns:
+        Tuple (EAN canonique ou None, motif de rejet ou None), une entrée par valeur
+    """
+    if not len(values):
+        return [], []
+    
+    digits = pd.Series(values, dtype=object).map(_cell_text).str.replace(r"[^0-9]", "", regex=True)
+    lengths = digits.str.len().to_numpy()
+    valid_length = np.isin(lengths, VALID_LENGTHS)
+    
+    # Toutes les valeurs sur 14 chiffres pour un calcul matriciel de la clé
+    padded = digits.where(valid_length, "").str.zfill(14)
+    matrix = np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8).reshape(-1, 14).astype(np.int64) - 48
+    expected_check = (10 - (matrix[:, :13] @ _WEIGHTS) % 10) % 10
+    valid = valid_length & (expected_check == matrix[:, 13])
+    
+    keep_gtin14 = (lengths == 14) & (matrix[:, 0] != 0)
+    canonical = np.where(lengths == 8, digits, np.where(keep_gtin14, padded, padded.str[1:]))
+    
+    reasons = np.select(
+        [lengths == 0, ~valid_length, ~valid],
+        [REJECT_EMPTY, REJECT_LENGTH, REJECT_CHECKSUM],
+        default=""
+    )
+    
+    return (
+        [ean if not reason else None for ean, reason in zip(canonical.tolist(), reasons.tolist())],
+        [reason or None for reason in reasons.tolist()]
+    )
+
+class EanNormalizer:
+    """
+    Étape de normalisation d'un lot, appelée par paquets (les doublons sont
+    détectés sur l'ensemble du lot)
+    """
+    
+    def __init__(self):
+        self.seen = set()
+        self.accepted = 0
+        self.rejected = Counter()
+        self.samples: List[Dict[str, str]] = []
+    
+    def normalize(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Retourne les enregistrements valides et nouveaux, avec leur EAN canonique"""
+        eans, reasons = normalize_eans([record.get('ean') for record in records])
+        
+        accepted = []
+        for record, ean, reason in zip(records, eans, reasons):
+            if reason is None and ean in self.seen:
+                reason = REJECT_DUPLICATE
+            if reason is not None:
+                self._reject(record.get('ean'), reason)
+                continue
+            self.seen.add(ean)
+            accepted.append({**record, 'ean': ean})
+        
+        self.accepted += len(accepted)
+        return accepted
+    
+    def _reject(self, value: Any, reason: str):
+        self.rejected[reason] += 1
+        if len(self.samples) < MAX_REJECTED_SAMPLES:
+            self.samples.append({'value': _cell_text(value), 'reason': reason})
+    
+    @property
+    def total_rejected(self) -> int:
+        return sum(self.rejected.values())
+    
+    def report(self) -> Dict[str, Any]:
+        """Bilan du lot: acceptés, rejets par motif et exemples"""
+        return {
+            'accepted': self.accepted,
+            'rejected': self.total_rejected,
+            'reasons': dict(self.rejected),
+            'samples': self.samples
+        }
+    
+    def summary(self) -> str:
+        """Bilan du lot en une ligne, pour les logs et les messages de tâche"""
+        if not self.rejected:
+            return f"{self.accepted} EANs retenus, aucun rejet"
+        details = ", ".join(f"{count} {reason}" for reason, count in self.rejected.most_common())
+        return f"{self.accepted} EANs retenus, {self.total_rejected} rejetés ({details})"
@@ -1,58 +1,145 @@
-import pandas as pd
+import asyncio
+import csv
 import logging
-import re
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from utils.ean_normalizer import EanNormalizer
 
 logger = logging.getLogger(__name__)
 
+# Lignes lues par aller-retour avec le thread de lecture (stream_records) et normalisées ensemble
+STREAM_CHUNK_SIZE = 500
+
 class ExcelParser:
-    """Parser pour les fichiers Excel contenant des EANs"""
+    """Parser pour les fichiers Excel et CSV contenant des EANs"""
     
     def parse_excel_data(self, file_path: str) -> List[Dict[str, Any]]:
         """Parse les données Excel pour extraire EANs, marques et boîtes"""
         try:
-            df = pd.read_excel(file_path)
-            logger.info(f"Fichier Excel lu avec {len(df)} lignes")
-            
-            # Chercher les colonnes pertinentes
-            ean_col = self.find_column(df, ['ean', 'code', 'barcode'])
-            brand_col = self.find_column(df, ['brand', 'marque', 'marca'])
-            box_col = self.find_column(df, ['box', 'boite', 'colis', 'box_number'])
-            
-            results = []
-            for _, row in df.iterrows():
-                ean = self.clean_ean(row.get(ean_col, '')) if ean_col else None
-                brand = row.get(brand_col, '') if brand_col else ''
-                box_number = row.get(box_col, '') if box_col else ''
-                
-                if ean:
-                    results.append({
-                        'ean': ean,
-                        'brand': brand,
-                        'box_number': str(box_number)
-                    })
-            
-            return results
+            return list(self.iter_records(file_path))
         except Exception as e:
             logger.error(f"Erreur lors du parsing Excel: {str(e)}")
             return []
     
-    def find_column(self, df, possible_names):
-        """Trouve une colonne dans le DataFrame"""
-        for col in df.columns:
+    def iter_records(
+        self,
+        file_path: str,
+        normalizer: Optional[EanNormalizer] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lit le fichier ligne à ligne et produit un enregistrement par EAN valide et nouveau
+        
+        Le fichier n'est jamais chargé entièrement: CSV via le module csv, xlsx en
+        mode lecture seule d'openpyxl. Seul l'ancien format .xls passe par pandas.
+        Les EANs sont normalisés par paquets de `chunk_size` lignes, le bilan des
+        rejets est disponible dans `normalizer`.
+        """
+        normalizer = normalizer if normalizer is not None else EanNormalizer()
+        suffix = Path(file_path).suffix.lower()
+        if suffix in ('.csv', '.txt'):
+            rows = self._iter_csv_rows(file_path)
+        elif suffix == '.xls':
+            rows = self._iter_xls_rows(file_path)
+        else:
+            rows = self._iter_xlsx_rows(file_path)
+        
+        header = None
+        chunk = []
+        for row in rows:
+            # La première ligne non vide donne les noms de colonnes
+            if header is None:
+                if any(value not in (None, '') for value in row):
+                    header = [str(value) if value is not None else '' for value in row]
+                    ean_index = self.find_column(header, ['ean', 'code', 'barcode'])
+                    brand_index = self.find_column(header, ['brand', 'marque', 'marca'])
+                    box_index = self.find_column(header, ['box', 'boite', 'colis', 'box_number'])
+                    if ean_index is None:
+                        logger.warning(f"Aucune colonne EAN trouvée dans {file_path}: {header}")
+                        return
+                continue
+            
+            chunk.append({
+                'ean': self._cell(row, ean_index),
+                'brand': self._text(self._cell(row, brand_index)),
+                'box_number': self._text(self._cell(row, box_index))
+            })
+            if len(chunk) >= chunk_size:
+                yield from normalizer.normalize(chunk)
+                chunk = []
+        
+        if chunk:
+            yield from normalizer.normalize(chunk)
+        
+        logger.info(f"Fichier {file_path} lu: {normalizer.summary()}")
+    
+    async def stream_records(
+        self,
+        file_path: str,
+        normalizer: Optional[EanNormalizer] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Version asynchrone d'iter_records: la lecture et la normalisation se font
+        dans un thread par paquets, le traitement commence dès le premier paquet
+        """
+        records = self.iter_records(file_path, normalizer, chunk_size)
+        
+        def next_chunk() -> List[Dict[str, Any]]:
+            return [record for _, record in zip(range(chunk_size), records)]
+        
+        while True:
+            chunk = await asyncio.to_thread(next_chunk)
+            if not chunk:
+                return
+            for record in chunk:
+                yield record
+    
+    def _iter_csv_rows(self, file_path: str) -> Iterator[Sequence[Any]]:
+        with open(file_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+            sample = f.read(64 * 1024)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.reader(f, dialect)
+    
+    def _iter_xlsx_rows(self, file_path: str) -> Iterator[Sequence[Any]]:
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    
+    def _iter_xls_rows(self, file_path: str) -> Iterator[Sequence[Any]]:
+        import pandas as pd
+        
+        df = pd.read_excel(file_path, header=None, dtype=object)
+        for row in df.itertuples(index=False, name=None):
+            yield [None if pd.isna(value) else value for value in row]
+    
+    def find_column(self, columns: Sequence[str], possible_names: List[str]) -> Optional[int]:
+        """Trouve l'index d'une colonne d'après son nom"""
+        for index, col in enumerate(columns):
             if any(name.lower() in col.lower() for name in possible_names):
-                return col
+                return index
         return None
     
-    def clean_ean(self, ean_value):
-        """Nettoie et valide un EAN"""
-        if pd.isna(ean_value):
+    @staticmethod
+    def _cell(row: Sequence[Any], index: Optional[int]) -> Any:
+        if index is None or index >= len(row):
             return None
-        
-        ean_str = re.sub(r'[^0-9]', '', str(ean_value).strip())
-        
-        if len(ean_str) == 13:
-            return ean_str
-        elif len(ean_str) > 13:
-            return ean_str[:13]
-        return None
\ No newline at end of file
+        return row[index]
+    
+    @staticmethod
+    def _text(value: Any) -> str:
+        """Valeur de cellule en texte (les nombres entiers d'Excel arrivent en float)"""
+        if value is None:
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
@@ -0,0 +1,76 @@
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class LRUCache:
+    """Cache mémoire LRU avec expiration (TTL) des entrées"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Incrémenté à chaque invalidation: une lecture commencée avant ne doit pas repeupler le cache
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retourne une copie de la valeur, ou None si absente ou expirée"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+    
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        Stocke une copie de la valeur
+        
+        Args:
+            generation: Génération lue avant la requête source; ignoré si une invalidation a eu lieu depuis
+        """
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        
+        self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Hashable):
+        """Supprime une entrée"""
+        self.generation += 1
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        """Vide le cache"""
+        self.generation += 1
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,60 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class _Call:
+    """Appel en cours et nombre d'appelants qui l'attendent"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Regroupe les appels asynchrones simultanés d'une même clé
+    
+    Le premier appelant lance le traitement, les suivants attendent le même
+    résultat (ou la même exception) au lieu de le relancer. Le traitement n'est
+    annulé que si tous ses appelants l'ont été.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        # Appels évités depuis le démarrage
+        self.shared = 0
+    
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+    
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "shared": self.shared}
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Exécute func() pour la clé, ou rejoint l'appel déjà en cours"""
+        call = self._calls.get(key)
+        joined = call is not None
+        
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.shared += 1
+        
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            # Dernier appelant annulé: plus personne n'attend le résultat
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+        
+        # Chaque appelant rejoint reçoit sa copie, comme les lectures du cache produit
+        return copy.deepcopy(result) if joined else result
+    
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
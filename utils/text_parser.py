@@ -32,7 +32,8 @@ class TextParser:
         qty_match = re.search(r'TOTA\s+QTE\s+BOX\s+(\d+)', text)
         total_qty = int(qty_match.group(1)) if qty_match else 0
         
-        ean_codes = re.findall(r'(\d{13})', text)
+        # Candidats UPC-A, EAN-13 et GTIN-14 (suites de chiffres isolées), validés par EanNormalizer
+        ean_codes = re.findall(r'(?<!\d)(\d{12,14})(?!\d)', text)
         
         return {
             "brand": brand,
@@ -0,0 +1,127 @@
+"""
+Pool de workers: python -m workers [--processes N] [--concurrency C] [--parser-processes P]
+
+Démarre N processus, chacun avec sa propre boucle asyncio, ses connexions à la
+base et son client HTTP, qui consomment la file de tâches persistante avec C
+tâches simultanées. SIGINT/SIGTERM arrête le pool proprement: les workers
+terminent leurs tâches en cours (WORKER_SHUTDOWN_TIMEOUT) avant de quitter.
+Un worker qui s'arrête de façon inattendue est relancé, après un délai qui
+double à chaque arrêt rapproché. Les processus du pool se partagent déjà les
+cœurs: par défaut, chacun analyse le HTML dans sa boucle (WORKER_PARSER_PROCESSES).
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import time
+
+from config.settings import settings
+from workers.task_worker import run_worker_process
+
+logger = logging.getLogger("workers")
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(processName)s] %(name)s: %(message)s"
+
+# Intervalle de surveillance des processus (secondes)
+SUPERVISE_INTERVAL = 1
+# Délai avant de relancer un worker arrêté, doublé à chaque arrêt rapproché (secondes)
+RESTART_BASE_DELAY = 1
+RESTART_MAX_DELAY = 60
+# Un worker resté actif plus longtemps repart du délai initial (secondes)
+RESTART_RESET_AFTER = 60
+
+class WorkerPool:
+    """Superviseur des processus workers"""
+    
+    def __init__(self, processes: int, concurrency: int, shutdown_timeout: float, parser_processes: int = 0):
+        self.processes = max(1, processes)
+        self.concurrency = max(1, concurrency)
+        self.parser_processes = max(0, parser_processes)
+        # Marge pour la remise en file et la fermeture des connexions
+        self.shutdown_timeout = shutdown_timeout + 10
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = {}
+        self._started_at = {}
+        # Index -> arrêts rapprochés et date de relance prévue
+        self._failures = {}
+        self._restart_at = {}
+        self._stopping = False
+    
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=run_worker_process,
+            args=(self.concurrency, LOG_FORMAT, self.parser_processes),
+            name=f"worker-{index}"
+        )
+        process.start()
+        self._workers[index] = process
+        self._started_at[index] = time.monotonic()
+        logger.info(f"Worker {index} démarré (pid {process.pid}, concurrence {self.concurrency})")
+    
+    def request_stop(self, *_):
+        if not self._stopping:
+            logger.info("Arrêt du pool demandé, fin des tâches en cours...")
+        self._stopping = True
+    
+    def run(self):
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+        
+        for index in range(self.processes):
+            self._spawn(index)
+        
+        while not self._stopping:
+            time.sleep(SUPERVISE_INTERVAL)
+            for index, process in list(self._workers.items()):
+                if not process.is_alive() and not self._stopping:
+                    self._restart(index, process)
+        
+        self.stop()
+    
+    def _restart(self, index: int, process: multiprocessing.process.BaseProcess):
+        """Relance un worker arrêté, avec un délai croissant s'il s'arrête à répétition"""
+        now = time.monotonic()
+        restart_at = self._restart_at.get(index)
+        if restart_at is None:
+            if now - self._started_at[index] >= RESTART_RESET_AFTER:
+                self._failures[index] = 0
+            self._failures[index] = self._failures.get(index, 0) + 1
+            delay = min(RESTART_MAX_DELAY, RESTART_BASE_DELAY * 2 ** (self._failures[index] - 1))
+            self._restart_at[index] = now + delay
+            logger.error(
+                f"Worker {index} arrêté de façon inattendue (code {process.exitcode}), "
+                f"redémarrage dans {delay}s"
+            )
+        elif now >= restart_at:
+            del self._restart_at[index]
+            self._spawn(index)
+    
+    def stop(self):
+        for process in self._workers.values():
+            if process.is_alive():
+                process.terminate()
+        
+        deadline = time.monotonic() + self.shutdown_timeout
+        for index, process in self._workers.items():
+            process.join(max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.error(f"Worker {index} toujours actif après {self.shutdown_timeout}s, arrêt forcé")
+                process.kill()
+                process.join()
+        logger.info("Pool de workers arrêté")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m workers", description="Pool de workers de scraping")
+    parser.add_argument("--processes", "-p", type=int, default=settings.workers.processes,
+                        help="Nombre de processus workers (WORKER_PROCESSES)")
+    parser.add_argument("--concurrency", "-c", type=int, default=settings.workers.concurrency,
+                        help="Tâches simultanées par processus (WORKER_CONCURRENCY)")
+    parser.add_argument("--parser-processes", type=int, default=settings.workers.parser_processes,
+                        help="Processus d'analyse HTML par worker (WORKER_PARSER_PROCESSES, 0 = dans la boucle)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    WorkerPool(args.processes, args.concurrency, settings.workers.shutdown_timeout, args.parser_processes).run()
+
+if __name__ == "__main__":
+    main()
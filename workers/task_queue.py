@@ -1,125 +1,141 @@
-import asyncio
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
+import time
+import uuid
+from typing import Dict, Any, List, Optional
 
+from config.settings import settings
+from database.repositories.task_repository import task_repository
 from scraper.processor import scraper_processor
+from utils.ean_normalizer import EanNormalizer
 
 logger = logging.getLogger(__name__)
 
-# Stockage des tâches (en mémoire, à remplacer par Redis pour production)
-tasks = {}
+# Types de tâches
+TASK_EAN = "ean"
+TASK_BOX = "box"
+TASK_FILE = "file"
+
+class TaskResults:
+    """
+    Résultats d'une tentative de tâche, écrits au fil de l'eau dans task_results
+    
+    Le premier résultat est écrit immédiatement, les suivants par lots de
+    TASK_RESULTS_FLUSH_SIZE ou toutes les TASK_RESULTS_FLUSH_INTERVAL secondes:
+    les clients voient les premiers produits sans attendre la fin de la tâche.
+    Les résultats d'une nouvelle tentative sont numérotés à la suite de ceux des
+    tentatives précédentes et les remplacent (voir TaskRepository.get_results).
+    """
+    
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.count = 0
+        self.attempt = 1
+        self._buffer: List[Any] = []
+        self._last_seq = 0
+        self._last_flush = 0.0
+    
+    async def start(self):
+        """Numérotation à la suite des résultats déjà enregistrés pour la tâche"""
+        self.attempt, self._last_seq = await task_repository.start_results(self.task_id)
+    
+    async def add(self, result: Any):
+        self._buffer.append(result)
+        self.count += 1
+        if (
+            len(self._buffer) >= settings.task_queue.results_flush_size
+            or time.monotonic() - self._last_flush >= settings.task_queue.results_flush_interval
+        ):
+            await self.flush()
+    
+    async def flush(self):
+        """Écrit les résultats en attente (lève l'erreur de la base: la tentative échoue)"""
+        buffer, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        if buffer:
+            await task_repository.append_results(self.task_id, self.attempt, self._last_seq + 1, buffer)
+            self._last_seq += len(buffer)
 
 class TaskQueue:
-    """Gestionnaire de file d'attente de tâches"""
+    """
+    Gestionnaire de file d'attente de tâches
+    
+    Les tâches sont persistées dans la table `tasks` (voir TaskRepository): elles
+    survivent à un redémarrage de l'API et sont consommées par les workers
+    (workers.task_worker), dans le processus de l'API ou dans des processus séparés.
+    """
+    
+    @staticmethod
+    async def enqueue(task_type: str, payload: Dict[str, Any], message: str) -> str:
+        """Ajoute une tâche à la file et retourne son identifiant"""
+        task_id = f"{task_type}_task_{uuid.uuid4()}"
+        await task_repository.create(
+            task_id=task_id,
+            task_type=task_type,
+            payload=payload,
+            message=message,
+            max_attempts=settings.task_queue.max_attempts
+        )
+        return task_id
     
     @staticmethod
-    async def process_ean_task(task_id: str, ean: str, brand: Optional[str] = None):
-        """Traite une tâche EAN en arrière-plan"""
-        logger.info(f"Démarrage de la tâche {task_id} pour l'EAN {ean}")
-        
-        try:
-            # Mettre à jour le statut
-            tasks[task_id]["status"] = "processing"
-            
-            # Traiter l'EAN
-            result = await scraper_processor.process_ean(ean=ean, brand=brand)
-            
-            # Mettre à jour le statut
-            tasks[task_id].update({
-                "status": "completed",
-                "message": f"EAN {ean} traité avec succès",
-                "completed_at": datetime.now(),
-                "results": [result]
-            })
-            
-            logger.info(f"Tâche {task_id} pour l'EAN {ean} terminée avec succès")
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du traitement de la tâche {task_id} pour l'EAN {ean}: {str(e)}")
-            
-            # Mettre à jour le statut en cas d'erreur
-            tasks[task_id].update({
-                "status": "failed",
-                "message": f"Erreur lors du traitement de l'EAN {ean}: {str(e)}",
-                "completed_at": datetime.now()
-            })
+    async def enqueue_ean(ean: str, brand: Optional[str] = None) -> str:
+        return await TaskQueue.enqueue(
+            TASK_EAN,
+            {"ean": ean, "brand": brand},
+            f"Traitement de l'EAN {ean} en attente..."
+        )
     
     @staticmethod
-    async def process_box_task(task_id: str, box_data: str):
-        """Traite une tâche de box en arrière-plan"""
-        logger.info(f"Démarrage de la tâche {task_id} pour les données de box")
-        
-        try:
-            # Mettre à jour le statut
-            tasks[task_id]["status"] = "processing"
-            
-            # Traiter les données de box
-            results = await scraper_processor.process_box_data(box_data)
-            
-            # Mettre à jour le statut
-            tasks[task_id].update({
-                "status": "completed",
-                "message": f"{len(results)} EANs traités avec succès",
-                "completed_at": datetime.now(),
-                "results": results
-            })
-            
-            logger.info(f"Tâche {task_id} pour les données de box terminée avec succès")
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du traitement de la tâche {task_id} pour les données de box: {str(e)}")
-            
-            # Mettre à jour le statut en cas d'erreur
-            tasks[task_id].update({
-                "status": "failed",
-                "message": f"Erreur lors du traitement des données de box: {str(e)}",
-                "completed_at": datetime.now()
-            })
+    async def enqueue_box(box_data: str) -> str:
+        return await TaskQueue.enqueue(
+            TASK_BOX,
+            {"box_data": box_data},
+            "Traitement des données de box en attente..."
+        )
     
     @staticmethod
-    async def process_file_task(task_id: str, file_path: str):
-        """Traite une tâche de fichier en arrière-plan"""
-        logger.info(f"Démarrage de la tâche {task_id} pour le fichier {file_path}")
-        
-        try:
-            # Mettre à jour le statut
-            tasks[task_id]["status"] = "processing"
-            
-            # Traiter le fichier Excel
-            results = await scraper_processor.process_excel_file(file_path)
-            
-            # Mettre à jour le statut
-            tasks[task_id].update({
-                "status": "completed",
-                "message": f"{len(results)} EANs traités avec succès",
-                "completed_at": datetime.now(),
-                "results": results
-            })
-            
-            logger.info(f"Tâche {task_id} pour le fichier {file_path} terminée avec succès")
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du traitement de la tâche {task_id} pour le fichier {file_path}: {str(e)}")
-            
-            # Mettre à jour le statut en cas d'erreur
-            tasks[task_id].update({
-                "status": "failed",
-                "message": f"Erreur lors du traitement du fichier: {str(e)}",
-                "completed_at": datetime.now()
-            })
+    async def enqueue_file(file_path: str) -> str:
+        return await TaskQueue.enqueue(
+            TASK_FILE,
+            {"file_path": file_path},
+            f"Traitement du fichier {file_path} en attente..."
+        )
     
     @staticmethod
-    def cleanup_old_tasks():
-        """Nettoie les anciennes tâches pour éviter des fuites de mémoire"""
-        # Implémentation simple, à optimiser pour la production
-        current_time = datetime.now()
-        tasks_to_remove = []
-        
-        for task_id, task_info in tasks.items():
-            created_at = task_info.get("created_at")
-            if created_at and (current_time - created_at).total_seconds() > 3600:  # 1 heure
-                tasks_to_remove.append(task_id)
-        
-        for task_id in tasks_to_remove:
-            tasks.pop(task_id, None)
\ No newline at end of file
+    async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
+        """Récupère une tâche et son statut"""
+        return await task_repository.get(task_id)
+    
+    @staticmethod
+    async def process_ean_task(results: TaskResults, ean: str, brand: Optional[str] = None) -> str:
+        """Traite une tâche EAN, retourne le message final"""
+        await results.add(await scraper_processor.process_ean(ean=ean, brand=brand))
+        return f"EAN {ean} traité avec succès"
+    
+    @staticmethod
+    async def process_box_task(results: TaskResults, box_data: str) -> str:
+        """Traite une tâche de box, chaque produit étant ajouté aux résultats dès qu'il est prêt"""
+        normalizer = EanNormalizer()
+        async for product in scraper_processor.stream_box_data(box_data, normalizer):
+            await results.add(product)
+        return f"{results.count} EANs traités avec succès ({normalizer.summary()})"
+    
+    @staticmethod
+    async def process_file_task(results: TaskResults, file_path: str) -> str:
+        """Traite une tâche de fichier, chaque produit étant ajouté aux résultats dès qu'il est prêt"""
+        normalizer = EanNormalizer()
+        async for product in scraper_processor.stream_excel_file(file_path, normalizer):
+            await results.add(product)
+        return f"{results.count} EANs traités avec succès ({normalizer.summary()})"
+    
+    @staticmethod
+    async def cleanup_old_tasks():
+        """Supprime les tâches terminées plus anciennes que la durée de rétention"""
+        await task_repository.purge_finished(settings.task_queue.retention)
+
+# Traitement associé à chaque type de tâche (arguments = TaskResults de la tâche, puis son payload)
+TASK_HANDLERS = {
+    TASK_EAN: TaskQueue.process_ean_task,
+    TASK_BOX: TaskQueue.process_box_task,
+    TASK_FILE: TaskQueue.process_file_task
+}
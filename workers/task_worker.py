@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Dict, Any, Optional, Tuple
+
+from config.settings import settings
+from database.repositories.task_repository import task_repository, TASK_FAILED
+from database.repositories.worker_repository import worker_repository
+from workers.task_queue import TaskQueue, TaskResults, TASK_HANDLERS
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de purge des tâches terminées (secondes)
+CLEANUP_INTERVAL = 3600
+
+class TaskWorker:
+    """
+    Consommateur de la file de tâches persistante
+    
+    Prend des tâches en bail (lease) dans la table `tasks`, renouvelle le bail tant
+    que la tâche tourne et enregistre le résultat. Si le worker meurt, le bail
+    expire après le délai de visibilité et un autre worker reprend la tâche. Les
+    échecs sont retentés avec un délai exponentiel puis mis en lettre morte.
+    """
+    
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: int = 1,
+        visibility_timeout: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        shutdown_timeout: Optional[float] = None
+    ):
+        self.hostname = socket.gethostname()
+        self.worker_id = worker_id or f"{self.hostname}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = max(1, concurrency)
+        self.visibility_timeout = visibility_timeout or settings.task_queue.visibility_timeout
+        self.poll_interval = poll_interval or settings.task_queue.poll_interval
+        self.shutdown_timeout = shutdown_timeout if shutdown_timeout is not None else settings.workers.shutdown_timeout
+        self._stopping = asyncio.Event()
+        # Tâches en cours -> identifiant de la tâche en file
+        self._running: Dict[asyncio.Task, str] = {}
+        self._run_task: Optional[asyncio.Task] = None
+        self._last_cleanup = 0.0
+        
+        # Statistiques
+        self.completed = 0
+        self.failed = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._run_task is not None and not self._run_task.done()
+    
+    async def _heartbeat(self, task_id: str, execution: asyncio.Task):
+        """Renouvelle le bail de la tâche tant qu'elle est en cours, et l'interrompt si le bail est perdu"""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            renewed = await task_repository.extend_lease(task_id, self.worker_id, self.visibility_timeout)
+            # None (erreur de base de données): le bail court encore, nouvel essai au prochain renouvellement
+            if renewed is False:
+                logger.warning(f"Worker {self.worker_id}: bail de la tâche {task_id} perdu, traitement interrompu")
+                execution.cancel()
+                return
+    
+    async def _execute(self, task: Dict[str, Any]):
+        task_id = task["id"]
+        logger.info(f"Worker {self.worker_id}: démarrage de la tâche {task_id} (tentative {task['attempts']})")
+        heartbeat = asyncio.create_task(self._heartbeat(task_id, asyncio.current_task()))
+        
+        try:
+            handler = TASK_HANDLERS.get(task["task_type"])
+            if handler is None:
+                raise ValueError(f"Type de tâche inconnu: {task['task_type']}")
+            
+            # Une nouvelle tentative (ou une tâche remise en file à l'arrêt) remplace les
+            # résultats des précédentes, numérotés à leur suite
+            results = TaskResults(task_id)
+            await results.start()
+            message = await handler(results, **task["payload"])
+            await results.flush()
+            await task_repository.complete(task_id, self.worker_id, message)
+            self.completed += 1
+            logger.info(f"Tâche {task_id} terminée avec succès")
+        
+        except asyncio.CancelledError:
+            # Arrêt du worker (remise en file par _drain), sauf si le bail a été perdu
+            if not heartbeat.done() or heartbeat.cancelled():
+                raise
+            # Bail expiré et repris par un autre worker: plus rien n'est enregistré pour cette tentative
+            logger.warning(f"Tâche {task_id} abandonnée: reprise par un autre worker")
+        
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement de la tâche {task_id}: {str(e)}")
+            retry_delay = settings.task_queue.retry_backoff * (2 ** (task["attempts"] - 1))
+            status = await task_repository.fail(task_id, self.worker_id, str(e), retry_delay)
+            self.failed += 1
+            if status == TASK_FAILED:
+                logger.error(f"Tâche {task_id} mise en lettre morte après {task['attempts']} tentative(s)")
+        
+        finally:
+            heartbeat.cancel()
+    
+    async def _cleanup(self):
+        if time.monotonic() - self._last_cleanup >= CLEANUP_INTERVAL:
+            self._last_cleanup = time.monotonic()
+            await TaskQueue.cleanup_old_tasks()
+            await worker_repository.purge_stale(settings.task_queue.retention)
+    
+    async def _report_health(self):
+        """Publie périodiquement l'état du worker dans la table `workers`"""
+        while True:
+            status = "stopping" if self._stopping.is_set() else "running"
+            await worker_repository.report(self.stats(), status)
+            await asyncio.sleep(settings.workers.heartbeat_interval)
+    
+    async def _drain(self):
+        """Attend les tâches en cours, puis remet en file celles qui dépassent le délai d'arrêt"""
+        if not self._running:
+            return
+        
+        logger.info(f"Worker {self.worker_id}: attente de {len(self._running)} tâche(s) en cours")
+        _, pending = await asyncio.wait(list(self._running), timeout=self.shutdown_timeout)
+        for running in pending:
+            running.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        
+        for running in pending:
+            task_id = self._running.pop(running, None)
+            if task_id is not None:
+                await task_repository.release(task_id, self.worker_id)
+                logger.warning(f"Worker {self.worker_id}: tâche {task_id} interrompue et remise en file")
+    
+    async def _acquire_slot(self, slots: asyncio.Semaphore) -> bool:
+        """Attend une place libre; False si l'arrêt est demandé entre-temps"""
+        acquire = asyncio.create_task(slots.acquire())
+        stopping = asyncio.create_task(self._stopping.wait())
+        await asyncio.wait({acquire, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        stopping.cancel()
+        
+        if not acquire.done():
+            acquire.cancel()
+            try:
+                await acquire
+            except asyncio.CancelledError:
+                pass
+        if acquire.done() and not acquire.cancelled() and self._stopping.is_set():
+            slots.release()
+        return not self._stopping.is_set()
+    
+    def _finished(self, running: asyncio.Task):
+        # Les tâches annulées à l'arrêt restent connues de _drain, qui les remet en file
+        if not running.cancelled():
+            self._running.pop(running, None)
+    
+    async def run(self):
+        """Consomme la file jusqu'à l'appel de stop(), puis attend les tâches en cours"""
+        logger.info(f"Worker {self.worker_id} démarré (concurrence {self.concurrency})")
+        slots = asyncio.Semaphore(self.concurrency)
+        reporter = asyncio.create_task(self._report_health())
+        
+        try:
+            while not self._stopping.is_set():
+                if not await self._acquire_slot(slots):
+                    break
+                await self._cleanup()
+                
+                task = await task_repository.lease(self.worker_id, self.visibility_timeout)
+                if task is None:
+                    slots.release()
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                running = asyncio.create_task(self._execute(task))
+                self._running[running] = task["id"]
+                running.add_done_callback(self._finished)
+                running.add_done_callback(lambda _: slots.release())
+            
+            await self._drain()
+        finally:
+            reporter.cancel()
+            await worker_repository.report(self.stats(), "stopped")
+            logger.info(f"Worker {self.worker_id} arrêté")
+    
+    async def start(self):
+        """Lance la boucle de consommation en arrière-plan"""
+        if not self.is_running:
+            self._stopping.clear()
+            self._run_task = asyncio.create_task(self.run())
+    
+    def request_stop(self):
+        """Demande l'arrêt: plus aucune nouvelle tâche n'est prise"""
+        self._stopping.set()
+    
+    async def stop(self):
+        """Arrête de prendre de nouvelles tâches et attend la fin des tâches en cours"""
+        self.request_stop()
+        if self._run_task is not None:
+            await self._run_task
+            self._run_task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du worker"""
+        return {
+            "worker_id": self.worker_id,
+            "hostname": self.hostname,
+            "pid": os.getpid(),
+            "concurrency": self.concurrency,
+            "active_tasks": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+# Worker intégré au processus de l'API (TASK_EMBEDDED_WORKER)
+embedded_worker = TaskWorker(concurrency=settings.workers.concurrency)
+
+async def run_standalone(concurrency: int = 1, stop_signals: Tuple[int, ...] = (signal.SIGINT, signal.SIGTERM)):
+    """Exécute un worker dans le processus courant jusqu'à la réception d'un des signaux d'arrêt"""
+    from database.db_manager import create_db_and_tables, close_db_connection
+    from scraper.parsing import parser_pool
+    from services.http_client import http_client
+    from services.image_pipeline import image_pipeline
+    
+    await create_db_and_tables()
+    await http_client.start()
+    
+    worker = TaskWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in stop_signals:
+        loop.add_signal_handler(sig, worker.request_stop)
+    
+    try:
+        await worker.run()
+    finally:
+        await image_pipeline.close()
+        await http_client.close()
+        parser_pool.close()
+        await close_db_connection()
+
+def run_worker_process(concurrency: int, log_format: str, parser_processes: int = 0):
+    """Point d'entrée d'un processus du pool (python -m workers)"""
+    from scraper.parsing import parser_pool
+    
+    logging.basicConfig(level=logging.INFO, format=log_format)
+    # Pool d'analyse HTML du worker (WORKER_PARSER_PROCESSES, aucun par défaut)
+    parser_pool.processes = parser_processes
+    # L'arrêt est piloté par le superviseur (SIGTERM), pas par le Ctrl+C du terminal
+    # envoyé à tout le groupe de processus: SIGINT reste ignoré, sans gestionnaire de boucle
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(run_standalone(concurrency, stop_signals=(signal.SIGTERM,)))
+
+if __name__ == "__main__":
+    # Worker autonome: python -m workers.task_worker (pool de processus: python -m workers)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run_standalone(settings.workers.concurrency))